@@ -1,96 +1,25 @@
 import os
-import time
-import json
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-import google.generativeai as genai
-from google.generativeai import types
-from dotenv import load_dotenv
-from bs4 import BeautifulSoup
+from gemini_client import GEMINI_BATCH_SIZE, GEMINI_MAX_CONCURRENCY, analyze_reviews_batch_with_gemini, is_valid_analysis
+from review_sources import iter_csv_reviews, iter_html_reviews, scrape_html_directory
+from import_journal import IMPORT_JOURNAL_PATH, ImportJournal, import_row_key
 
-# Load environment variables (including GEMINI_API_KEY)
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Optional directory of scraped HTML pages, parsed in parallel and imported after the mock HTML file.
+HTML_REVIEWS_DIR = os.getenv("HTML_REVIEWS_DIR")
 
-# Configure the Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
-
-def parse_html_reviews(html_file_path):
-    """Parses the mock HTML file to extract university reviews."""
-    reviews_data = []
+def parse_html_reviews(html_file_path, mode=None):
+    """Parses the mock HTML file to extract university reviews (see review_sources.HTML_SCRAPER_MODE)."""
     try:
-        with open(html_file_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
-        
-        review_cards = soup.find_all('div', class_='uni-review-card')
-        
-        for card in review_cards:
-            uni_name = card.find('h4', class_='uni-name').get_text(strip=True) if card.find('h4', class_='uni-name') else None
-            city = card.find('p', class_='uni-city').get_text(strip=True) if card.find('p', class_='uni-city') else None
-            review_body = card.find('p', class_='review-body').get_text(strip=True) if card.find('p', class_='review-body') else None
-            
-            if uni_name and review_body: # City is optional, but name and review are essential
-                reviews_data.append({
-                    'uni_name': uni_name,
-                    'city': city,
-                    'raw_review_text': review_body,
-                    'source_type': 'html_scrape' # Indicate the source of this data
-                })
+        return list(iter_html_reviews(html_file_path, mode))
     except FileNotFoundError:
         print(f"❌ ERROR: HTML mock reviews file not found at {html_file_path}")
         return []
     except Exception as e:
         print(f"❌ ERROR parsing HTML reviews: {e}")
         return []
-    
-    return reviews_data
-
-def analyze_review_with_gemini(review_text, uni_name):
-    """Sends the review to Gemini for ABSA and structured JSON return."""
-    
-    # 1. Define the Structured Output Schema (Pydantic style for clarity).
-    # This is critical for getting clean, reliable data into your DB.
-    response_schema = {
-        "type": "object",
-        "properties": {
-            "overall_sentiment": {"type": "string", "description": "Positive, Neutral, or Negative."},
-            "academics_score": {"type": "integer", "description": "Score from 1 (poor) to 5 (excellent)."},
-            "cost_score": {"type": "integer", "description": "Score from 1 (expensive) to 5 (cheap)."},
-            "social_score": {"type": "integer", "description": "Score from 1 (poor) to 5 (excellent)."},
-            "accommodation_score": {"type": "integer", "description": "Score from 1 (difficult) to 5 (easy/good)."},
-            "theme_summary": {"type": "string", "description": "A concise narrative summary (around 30-40 words) using simple language, covering academics, cost, social scene, and accommodation, including a short quote from the original review text."}
-        },
-        "required": ["overall_sentiment", "academics_score", "cost_score", "social_score", "accommodation_score", "theme_summary"]
-    }
-    
-    # 2. Craft the Multilingual Prompt (The Magic)
-    prompt = f"""
-    You are an expert student advisor analyzing feedback for {uni_name}. 
-    Your goal is to synthesize a very concise, easy-to-understand narrative review (approximately 30-40 words) for the university "{uni_name}". 
-    
-    The review must briefly cover Academics, Cost of Living, Social Scene, and Accommodation, using simple, direct language.
-    
-    Include one very short, direct quote from the provided student feedback to support a key point. Ensure the summary is structured as a single narrative paragraph.
-    
-    Synthesize the report from the following raw student feedback (which may contain both English and Arabic):
-    
-    Review Text: "{review_text}"
-    """
-    
-    try:
-        model = genai.GenerativeModel(
-            model_name='gemini-2.5-flash',
-            generation_config=types.GenerationConfig(
-                response_mime_type="application/json",
-                response_schema=response_schema
-            )
-        )
-        response = model.generate_content(prompt)
-        # The response text will be a clean JSON string, which we parse.
-        return json.loads(response.text)
-        
-    except Exception as e:
-        print(f"❌ Gemini API call failed for {uni_name}: {e}")
-        return None
 
 def assign_mock_majors(uni_name):
     """Assigns mock major data based on the university name."""
@@ -108,190 +37,268 @@ def assign_mock_majors(uni_name):
     else:
         return ["General Studies"]
 
-def process_data_pipeline():
-    """Reads raw CSV data, cleans it, and processes reviews with Gemini."""
-
-    # Construct absolute paths to data files.
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_path = os.path.join(script_dir, '..', 'data', 'raw_survey_data.csv')
-    html_path = os.path.join(script_dir, '..', 'frontend', 'src', 'mock_reviews.html')
-
-    all_raw_data = []
-
-    # 1. READ DATA FROM CSV
+def read_source(description, reviews):
+    """Passes reviews through from one input, reporting (instead of raising) a missing or unreadable file."""
     try:
-        df_csv = pd.read_csv(csv_path)
-        # Rename columns for consistency and clarity in the processing pipeline.
-        df_csv.rename(columns={
-            'Timestamp': 'date_collected',
-            'Which university are you rating?': 'uni_name',
-            'City': 'city',
-            'Cost of living': 'cost_score',
-            'Social scene quality': 'social_score',
-            'Accommodation ease (How easy it is to find a living space)': 'accommodation_score',
-            'Please provide your overall experience or any additional comments about your univerisity': 'raw_review_text',
-        }, inplace=True)
-        # Convert DataFrame rows to a list of dictionaries.
-        all_raw_data.extend(df_csv.to_dict(orient='records'))
-
+        yield from reviews
     except FileNotFoundError:
-        print(f"❌ ERROR: Raw survey data not found at {csv_path}")
+        print(f"❌ ERROR: {description} not found.")
     except Exception as e:
-        print(f"❌ ERROR reading or processing CSV data: {e}")
+        print(f"❌ ERROR reading {description}: {e}")
 
-    # 2. READ DATA FROM MOCK HTML
-    html_reviews = parse_html_reviews(html_path)
-    all_raw_data.extend(html_reviews)
+def iter_raw_reviews(csv_path, html_path, html_dir=None):
+    """Yields raw review dicts from the survey CSV and then the scraped HTML, one at a time."""
+    yield from read_source(f"raw survey data at {csv_path}", iter_csv_reviews(csv_path))
+    yield from read_source(f"HTML mock reviews file at {html_path}", iter_html_reviews(html_path))
+    if html_dir:
+        yield from read_source(f"scraped HTML directory {html_dir}", scrape_html_directory(html_dir))
 
-    if not all_raw_data:
-        print("⚠️ WARNING: No data found from CSV or HTML. Returning empty list for processing.")
-        return []
+def iter_valid_reviews(rows):
+    """Drops reviews where the core text is missing, to avoid unnecessary AI calls."""
+    for row in rows:
+        if pd.isna(row.get('raw_review_text')):
+            print(f"⚠️ Skipping review for {row.get('uni_name', 'Unknown Uni')} due to missing raw_review_text.")
+            continue
+        yield row
+
+def skip_committed(rows, journal):
+    """Drops reviews that an interrupted earlier run already wrote to the database."""
+    skipped_count = 0
+    for chunk in iter_batches(rows, 500):
+        committed = journal.committed_keys(import_row_key(row) for row in chunk)
+        for row in chunk:
+            if import_row_key(row) in committed:
+                skipped_count += 1
+            else:
+                yield row
+    if skipped_count:
+        print(f"⏭️ Skipped {skipped_count} reviews already imported by the interrupted run.")
 
-    # Convert combined data to a DataFrame for easier processing.
-    df = pd.DataFrame(all_raw_data)
+def iter_batches(items, batch_size):
+    """Groups an iterable into lists of at most `batch_size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-    processed_records = []
+def analyze_batch(rows, journal=None):
+    """Analyzes one batch of rows, keyed by position, reusing analyses checkpointed in `journal`.
 
-    # 3. ITERATE, PROCESS, and ENRICH each review using the Gemini AI.
-    for index, row in df.iterrows():
-        # Skip reviews where the core text is missing to avoid unnecessary AI calls.
-        if pd.isna(row['raw_review_text']):
-            print(f"⚠️ Skipping review for {row.get('uni_name', 'Unknown Uni')} due to missing raw_review_text.")
-            continue
+    Fresh, valid analyses are written to the journal before returning, so a crash after this
+    point never costs those API calls again. Failed or malformed ones are not, so a rerun retries them.
+    """
+    row_keys = [import_row_key(row) for row in rows]
+    saved = journal.get_analyses(row_keys) if journal is not None else {}
+    results = {str(position): saved[key] for position, key in enumerate(row_keys) if key in saved}
+
+    # The row position within its batch is the review ID.
+    reviews = [(str(position), row['raw_review_text'], row['uni_name']) for position, row in enumerate(rows) if str(position) not in results]
+    if reviews:
+        fresh_results = analyze_reviews_batch_with_gemini(reviews)
+        if journal is not None:
+            journal.record_analyses({row_keys[int(review_id)]: result for review_id, result in fresh_results.items() if is_valid_analysis(result)})
+        results.update(fresh_results)
+    return results
 
-        # Call the Gemini API to analyze the review.
-        gemini_result = analyze_review_with_gemini(row['raw_review_text'], row['uni_name'])
+def enrich_batch(rows, gemini_results, failures=None):
+    """Merges each row with its Gemini analysis.
 
-        if gemini_result:
+    Rows whose analysis failed or is malformed are dropped and, if a `failures` list is
+    given, appended to it so the caller knows the import is incomplete.
+    """
+    records = []
+    for position, row in enumerate(rows):
+        gemini_result = gemini_results.get(str(position))
+        if is_valid_analysis(gemini_result):
             # Merge the AI-generated results with the original data.
-            record = {
+            records.append({
                 'uni_name': row['uni_name'],
                 'city': row['city'],
                 'source_type': row.get('source_type', 'csv_survey'), # Default to csv_survey if not specified.
                 'raw_review_text': row['raw_review_text'],
                 **gemini_result, # Unpack the dictionary containing AI scores and summary.
-                'major': assign_mock_majors(row['uni_name']) # Assign mock majors
-            }
-            processed_records.append(record)
+                'major': assign_mock_majors(row['uni_name']), # Assign mock majors
+                'row_key': import_row_key(row) # Lets insert_records checkpoint the review once it is written
+            })
             print(f"✅ Successfully processed and enriched review for: {row['uni_name']}")
-            # Rate limit protection: pause 13 seconds to avoid 429 errors from Gemini API
-            print("⏳ Pausing for 13 seconds to avoid Gemini API rate limit (429 error)...")
-            time.sleep(13)
         else:
             print(f"❌ Failed to get Gemini result for review from {row.get('uni_name', 'Unknown Uni')}. Skipping.")
+            if failures is not None:
+                failures.append(row)
+    return records
+
+def iter_enriched_records(rows, journal=None, failures=None):
+    """Sends reviews to Gemini GEMINI_BATCH_SIZE at a time, several batches in parallel.
+
+    The shared rate limiter keeps the workers within the RPM/TPM quotas. At most
+    2 * GEMINI_MAX_CONCURRENCY batches are in flight, so reading the input never runs
+    far ahead of the API, and records are yielded in input order.
+    With a `journal`, committed reviews are skipped and checkpointed analyses reused.
+    Reviews that could not be analyzed are appended to `failures` (see enrich_batch).
+    """
+    if journal is not None:
+        rows = skip_committed(rows, journal)
+    batch_size = max(1, GEMINI_BATCH_SIZE)
+    max_in_flight = 2 * GEMINI_MAX_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY) as executor:
+        in_flight = deque()
+        for batch in iter_batches(rows, batch_size):
+            in_flight.append((batch, executor.submit(analyze_batch, batch, journal)))
+            if len(in_flight) >= max_in_flight:
+                batch, future = in_flight.popleft()
+                yield from enrich_batch(batch, future.result(), failures)
+        while in_flight:
+            batch, future = in_flight.popleft()
+            yield from enrich_batch(batch, future.result(), failures)
 
-    return processed_records
+def process_data_pipeline(journal=None, failures=None):
+    """Streams the raw CSV and HTML reviews through validation and Gemini enrichment.
+
+    Returns a generator of enriched records. Nothing is read until it is iterated, and
+    memory use stays constant however large the inputs are. Pass the run's ImportJournal
+    to resume an interrupted run, and a list as `failures` to collect the reviews Gemini
+    could not analyze.
+    """
+    # Construct absolute paths to data files.
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    csv_path = os.path.join(script_dir, '..', 'data', 'raw_survey_data.csv')
+    html_path = os.path.join(script_dir, '..', 'frontend', 'src', 'mock_reviews.html')
+
+    return iter_enriched_records(iter_valid_reviews(iter_raw_reviews(csv_path, html_path, HTML_REVIEWS_DIR)), journal, failures)
 
 # --- DATABASE INSERTION FUNCTION ---
-def insert_records(records):
-    """Inserts a list of processed review dictionaries into the PostgreSQL database."""
-    from app import get_db_connection # Import the connector function from app.py to establish DB connection.
-    
-    conn = get_db_connection()
-    if conn is None:
-        print("❌ FATAL ERROR: Cannot insert data. Database connection failed.")
-        return
-
-    cursor = conn.cursor()
-    # Define the columns that we are inserting data into in the `exchange_reviews` table.
-    columns = (
-        "uni_name, city, source_type, raw_language, academics_score, "
-        "cost_score, social_score, accommodation_score, theme_summary, raw_review_text, reviewer_type, status, major"
+# Records per multi-row INSERT statement and per transaction sent by insert_records.
+INSERT_PAGE_SIZE = int(os.getenv("INSERT_PAGE_SIZE", "500"))
+
+SQL_UPSERT_REVIEWS = """
+    INSERT INTO exchange_reviews (
+        uni_name, city, source_type, raw_language, overall_sentiment, academics_score,
+        cost_score, social_score, accommodation_score, theme_summary, raw_review_text, reviewer_type, status, major
+    ) VALUES %s
+    ON CONFLICT (uni_name, review_hash, reviewer_type) WHERE reviewer_type = 'ai_processed'
+    DO UPDATE SET
+        city = EXCLUDED.city,
+        source_type = EXCLUDED.source_type,
+        raw_language = EXCLUDED.raw_language,
+        overall_sentiment = EXCLUDED.overall_sentiment,
+        academics_score = EXCLUDED.academics_score,
+        cost_score = EXCLUDED.cost_score,
+        social_score = EXCLUDED.social_score,
+        accommodation_score = EXCLUDED.accommodation_score,
+        theme_summary = EXCLUDED.theme_summary,
+        status = EXCLUDED.status,
+        major = EXCLUDED.major
+    RETURNING (xmax = 0) AS inserted;
+"""
+
+def record_values(record):
+    """The row tuple for one processed record, in SQL_UPSERT_REVIEWS column order."""
+    raw_language_guess = 'ar' if any('\u0600' <= c <= '\u06FF' for c in record['raw_review_text']) else 'en'
+    # For AI-processed records, reviewer_type is always 'ai_processed' and status is 'approved'.
+    return (
+        record['uni_name'],
+        record['city'],
+        record.get('source_type', 'unknown'),
+        raw_language_guess,
+        record.get('overall_sentiment'),
+        record['academics_score'],
+        record['cost_score'],
+        record['social_score'],
+        record['accommodation_score'],
+        record['theme_summary'],
+        record['raw_review_text'],
+        'ai_processed',
+        'approved',
+        record['major'] # Include the major array
     )
-    
-    insert_count = 0
-    update_count = 0
-    try:
-        for record in records:
-            # Prepare the tuple of values, ensuring the order matches the columns defined above.
-            raw_language_guess = 'ar' if any('\u0600' <= c <= '\u06FF' for c in record['raw_review_text']) else 'en'
-            
-            # For AI-processed records, ensure reviewer_type is 'ai_processed' and status is 'approved'
-            record_reviewer_type = 'ai_processed'
-            record_status = 'approved'
-
-            values = (
-                record['uni_name'],
-                record['city'],
-                record.get('source_type', 'unknown'),
-                raw_language_guess,
-                record['academics_score'],
-                record['cost_score'],
-                record['social_score'],
-                record['accommodation_score'],
-                record['theme_summary'],
-                record['raw_review_text'],
-                record_reviewer_type,
-                record_status,
-                record['major'] # Include the major array
-            )
-
-            # Check if the record already exists based on uni_name, raw_review_text, and reviewer_type
-            cursor.execute(
-                "SELECT id FROM exchange_reviews WHERE uni_name = %s AND raw_review_text = %s AND reviewer_type = %s;",
-                (record['uni_name'], record['raw_review_text'], record_reviewer_type)
-            )
-            existing_record = cursor.fetchone()
-
-            if existing_record:
-                # If record exists, update its AI-generated fields and status
-                sql_update = """
-                    UPDATE exchange_reviews
-                    SET 
-                        city = %s,
-                        source_type = %s,
-                        raw_language = %s,
-                        academics_score = %s,
-                        cost_score = %s,
-                        social_score = %s,
-                        accommodation_score = %s,
-                        theme_summary = %s,
-                        status = %s,
-                        major = %s
-                    WHERE id = %s;
-                """
-                cursor.execute(sql_update, (
-                    record['city'],
-                    record.get('source_type', 'unknown'),
-                    raw_language_guess,
-                    record['academics_score'],
-                    record['cost_score'],
-                    record['social_score'],
-                    record['accommodation_score'],
-                    record['theme_summary'],
-                    record_status, # Update status to approved for AI-processed reviews
-                    record['major'],
-                    existing_record[0]
-                ))
-                update_count += 1
-            else:
-                # If record does not exist, insert a new one
-                placeholders = ', '.join(['%s'] * len(columns.split(', ')))
-                sql_insert = f"""
-                    INSERT INTO exchange_reviews ({columns}) 
-                    VALUES ({placeholders});
-                """
-                cursor.execute(sql_insert, values)
-                insert_count += 1
-        
-        conn.commit()
-        print(f"✅ SUCCESS: Successfully inserted {insert_count} new records and updated {update_count} existing records into the database.")
-        
-    except Exception as e:
-        conn.rollback() # Rollback any partial inserts on error to maintain database consistency.
-        print(f"❌ ERROR during insertion/update into database: {e}")
-        
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+
+def write_page(records):
+    """Upserts one page of records in its own transaction; returns (inserted, updated), or None on failure."""
+    from psycopg2.extras import execute_values
+    from db_pool import pooled_connection # Reuse the pooled connector shared with app.py.
+
+    # ON CONFLICT cannot touch the same row twice in one statement, so keep only the last
+    # copy of any review that appears more than once in this page.
+    unique_records = {}
+    for record in records:
+        unique_records[(record['uni_name'], record['raw_review_text'])] = record
+    values = [record_values(record) for record in unique_records.values()]
+
+    with pooled_connection() as conn:
+        if conn is None:
+            print("❌ FATAL ERROR: Cannot insert data. Database connection failed.")
+            return None
+
+        cursor = conn.cursor()
+        try:
+            # xmax = 0 marks freshly inserted rows.
+            outcomes = execute_values(cursor, SQL_UPSERT_REVIEWS, values, page_size=len(values), fetch=True)
+            conn.commit()
+            insert_count = sum(1 for (inserted,) in outcomes if inserted)
+            return insert_count, len(outcomes) - insert_count
+
+        except Exception as e:
+            conn.rollback() # Rollback the partial page on error to maintain database consistency.
+            print(f"❌ ERROR during insertion/update into database: {e}")
+            return None
+
+        finally:
+            if cursor: cursor.close()
+
+def insert_records(records, journal=None):
+    """Upserts processed review dictionaries into the PostgreSQL database as they arrive.
+
+    `records` may be any iterable, including the generator returned by process_data_pipeline:
+    every INSERT_PAGE_SIZE records are written and committed before the next ones are pulled,
+    so early records reach the database while later ones are still being processed.
+    With a `journal`, each committed page is checkpointed so a restarted run skips it.
+    Relies on the exchange_reviews_ai_review_key unique index (migrations/0002) on
+    (uni_name, review_hash, reviewer_type): new reviews are inserted, and reviews that
+    were imported before get their AI-generated fields refreshed.
+    Returns True if every record was written, False if the import stopped on an error.
+    """
+    insert_count = update_count = 0
+    for page in iter_batches(records, INSERT_PAGE_SIZE):
+        outcome = write_page(page)
+        if outcome is None:
+            print(f"❌ Import stopped. {insert_count} new and {update_count} updated records were committed before the failure.")
+            return False
+        if journal is not None:
+            journal.mark_committed(record['row_key'] for record in page if 'row_key' in record)
+        insert_count += outcome[0]
+        update_count += outcome[1]
+        print(f"💾 Committed {len(page)} records ({insert_count + update_count} so far).")
+
+    print(f"✅ SUCCESS: Successfully inserted {insert_count} new records and updated {update_count} existing records into the database.")
+    return True
 
 # --- Main execution block when the script is run directly ---
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Enrich raw reviews with Gemini and import them into the database.")
+    parser.add_argument("--fresh", action="store_true", help="discard the checkpoint of an interrupted run and start over")
+    args = parser.parse_args()
+
     print("--- Starting AI Processing Pipeline ---")
-    processed_data = process_data_pipeline()
-    
-    if processed_data:
-        print(f"Pipeline complete. Attempting to insert {len(processed_data)} records into the database...")
-        insert_records(processed_data)
+    journal = ImportJournal(IMPORT_JOURNAL_PATH)
+    if args.fresh:
+        journal.clear()
+    progress = journal.counts()
+    if progress:
+        print(f"🔁 Resuming interrupted run: {progress.get('committed', 0)} reviews already imported, "
+              f"{progress.get('analyzed', 0)} analyzed but not yet written. Use --fresh to start over.")
+
+    # Records flow from the input files through Gemini into the database in pages.
+    failures = []
+    if not insert_records(process_data_pipeline(journal, failures), journal):
+        print("Pipeline interrupted. Run it again to resume where it stopped.")
+    elif failures:
+        # Keep the journal: a rerun skips what was imported and only calls Gemini for the missing reviews.
+        print(f"⚠️ Pipeline incomplete: {len(failures)} reviews could not be analyzed and were not imported. "
+              "Run it again to retry them.")
     else:
-        print("No data processed. Database insertion skipped.")
\ No newline at end of file
+        journal.clear()
+        print("Pipeline complete.")
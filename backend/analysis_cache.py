@@ -0,0 +1,67 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+def analysis_cache_key(*parts):
+    """Content-addressed key: SHA-256 over the canonical JSON encoding of every input that shapes a result."""
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Persistent key/value store for Gemini results, backed by a local SQLite file.
+
+    Values are JSON-serializable dicts. The store is safe to share between threads and,
+    thanks to WAL mode, between processes on the same machine.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            " cache_key TEXT PRIMARY KEY,"
+            " result TEXT NOT NULL,"
+            " created_at REAL NOT NULL"
+            ");"
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        """Returns the cached result for `key`, or None."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Returns a dict of the cached results for whichever of `keys` are present."""
+        keys = list(keys)
+        found = {}
+        with self.lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT cache_key, result FROM analysis_cache WHERE cache_key IN ({placeholders});",
+                    chunk
+                ).fetchall()
+                found.update((cache_key, json.loads(result)) for cache_key, result in rows)
+        return found
+
+    def put(self, key, result):
+        """Stores `result` under `key`, replacing any previous value."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (cache_key, result, created_at) VALUES (?, ?, ?);",
+                (key, json.dumps(result, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
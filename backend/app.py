@@ -1,351 +1,776 @@
 import os
-import psycopg2
-from flask import Flask, jsonify, request
+import uuid
+from flask import Flask, jsonify, request, url_for
 from dotenv import load_dotenv
 from flask_cors import CORS
+from db_pool import pooled_connection, open_dedicated_connection
+from cache import CACHE_INVALIDATION_BACKEND, NotificationListener, TTLCache
+from conditional import DataVersion, conditional_on
+from serialization import FastJSONProvider
+from metrics import init_metrics, register_gauge
+from compression import init_compression
+from summary_jobs import enqueue_summary_job, get_last_summary, get_summary_job
+from pagination import PaginationError, decode_cursor, encode_cursor, parse_fields, parse_limit
+from submission_queue import (
+    SUBMIT_WRITE_BEHIND, enqueue_submission, ensure_flusher_running, get_submission_queue,
+    insert_submissions, submission_values
+)
 
 # --- 1. Load Environment Variables from .env file ---
 # This makes your DB credentials available to the application.
 load_dotenv()
 
-# --- 2. Configure Database Connection Details from .env ---
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
+# --- 2. Database connections ---
+# Connection details are read from .env by db_pool, which keeps a pool of warm
+# connections per worker process. Every route checks one out via pooled_connection().
 
 # --- In-memory cache for aggregated university details ---
-university_details_cache = {}
-# You could add a simple timestamp to each cached entry for time-based invalidation
+# Bounded (LRU) and time-limited per worker. With the 'postgres' invalidation backend,
+# every worker also evicts an entry as soon as the database reports a change to that
+# university, whichever process made it.
+university_details_cache = TTLCache(
+    max_entries=int(os.getenv("UNIVERSITY_CACHE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("UNIVERSITY_CACHE_TTL", "300"))
+)
+
+def load_data_version():
+    """Reads (version, updated_at) from the data_version table (migrations/0007)."""
+    with pooled_connection() as conn:
+        if conn is None:
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT version, updated_at FROM data_version;")
+            return cursor.fetchone()
+        except Exception as e:
+            print(f"Error reading data version: {e}")
+            return None
+        finally:
+            cursor.close()
+
+# --- Data version for conditional requests (ETag / Last-Modified) on read endpoints ---
+data_version = DataVersion(load_data_version)
+
+# With the 'postgres' backend, database triggers push cache evictions and data version bumps
+# to every worker. Otherwise each worker evicts locally and reads the version per request.
+notification_listener = None
+if CACHE_INVALIDATION_BACKEND == 'postgres':
+    notification_listener = NotificationListener(open_dedicated_connection)
+    notification_listener.subscribe('university_cache', university_details_cache.delete, on_connect=university_details_cache.clear)
+    notification_listener.subscribe('data_version', data_version.on_notification, on_connect=data_version.on_connect, on_disconnect=data_version.on_disconnect)
 
 # --- 3. Flask App Initialization ---
 app = Flask(__name__)
+# Serialize JSON with orjson (when installed) and compress large responses (gzip/brotli).
+app.json = FastJSONProvider(app)
+# Per-route latency histograms, Server-Timing headers and GET /metrics. Registered before
+# compression so the timing covers it.
+init_metrics(app)
+init_compression(app)
 # Enable CORS to allow the frontend (on a different port) to access this backend
 CORS(app)
 
-# --- Helper function for database connection ---
-def get_db_connection():
-    """Establishes and returns a connection to the PostgreSQL database."""
-    conn = None
-    try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
-        print("Database connection established successfully!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to the database: {e}")
-        return None
-
-def get_raw_reviews_text(uni_name):
-    """Fetches a list of all raw review texts for a given university."""
-    conn = get_db_connection()
-    if conn is None: return []
-
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            "SELECT raw_review_text FROM exchange_reviews WHERE uni_name = %s;",
-            (uni_name,)
-        )
-        reviews = [row[0] for row in cursor.fetchall()]
-        return reviews
-    except Exception as e:
-        print(f"Error fetching raw reviews: {e}")
-        return []
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+@app.before_request
+def start_notification_listener():
+    """Starts the notification listener lazily, so each gunicorn worker runs its own after forking."""
+    if notification_listener is not None:
+        notification_listener.ensure_running()
+
+if SUBMIT_WRITE_BEHIND:
+    # Each worker flushes the shared queue file, including submissions left over from before a restart.
+    app.before_request(ensure_flusher_running)
+    register_gauge("exchange_submission_queue_depth", "Review submissions queued but not yet written to PostgreSQL.", lambda: get_submission_queue().depth())
+    register_gauge("exchange_submission_queue_failed", "Queued review submissions PostgreSQL rejected.", lambda: get_submission_queue().failed_count())
 
 @app.route('/api/summary/<uni_name>', methods=['GET'])
 def get_ai_summary(uni_name):
-    """Generates a comprehensive summary review using Gemini based on all raw reviews, with caching."""
-    # 1. Attempt to retrieve a cached theme_summary from the database
-    conn = get_db_connection()
-    if conn is None:
-        return jsonify({"error": "Database connection failed"}), 500
-
-    cursor = conn.cursor()
-    try:
-        # Look for an approved, AI-processed theme_summary in the database
-        cursor.execute(
-            "SELECT theme_summary FROM exchange_reviews WHERE uni_name = %s AND theme_summary IS NOT NULL AND reviewer_type = 'ai_processed' AND status = 'approved' LIMIT 1;",
-            (uni_name,)
-        )
-        cached_summary = cursor.fetchone()
-
-        if cached_summary and cached_summary[0]:
-            print(f"✅ Cache hit: Returning cached AI summary for {uni_name}.")
-            return jsonify({"summary": cached_summary[0]}), 200
-
-        # 2. If no cached summary, retrieve all raw reviews for the given university to generate a new one.
-        print(f"⚠️ Cache miss: Generating new AI summary for {uni_name}...")
-        raw_reviews_list = get_raw_reviews_text(uni_name)
-        if not raw_reviews_list:
-            return jsonify({"summary": f"No reviews found for {uni_name}. Cannot generate AI summary."}), 200
-
-        # Combine reviews into a single string to provide sufficient context for the LLM.
-        all_reviews_text = "\n---\n".join(raw_reviews_list)
-
-        # 3. Dynamically import the AI analysis function.
-        from ai_processor import analyze_review_with_gemini
-        
-        # Call the dedicated AI analysis function from ai_processor.py.
-        gemini_result = analyze_review_with_gemini(all_reviews_text, uni_name)
+    """Returns the cached AI summary for a university, or starts generating one in the background.
 
-        if gemini_result and gemini_result.get("theme_summary"):
-            generated_summary = gemini_result["theme_summary"]
-            print(f"✅ AI summary generated for {uni_name}. Attempting to cache...")
+    A cache miss answers 202 with a job ID right away; poll /api/summary/jobs/<job_id> for the result.
+    """
+    # 1. Attempt to retrieve a cached theme_summary from the database
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
 
-            # Update an existing AI-processed record with the new summary
-            # We'll find an existing 'ai_processed' and 'approved' review to update its summary
-            # If no such record exists (which shouldn't happen if ai_processor.py ran), we can insert a placeholder
+        cursor = conn.cursor()
+        try:
+            # Look for an approved, AI-processed theme_summary in the database
             cursor.execute(
-                "UPDATE exchange_reviews SET theme_summary = %s WHERE uni_name = %s AND reviewer_type = 'ai_processed' AND status = 'approved' AND theme_summary IS NOT NULL LIMIT 1 RETURNING id;",
-                (generated_summary, uni_name)
+                "SELECT theme_summary FROM exchange_reviews WHERE uni_name = %s AND theme_summary IS NOT NULL AND reviewer_type = 'ai_processed' AND status = 'approved' LIMIT 1;",
+                (uni_name,)
             )
-            updated_id = cursor.fetchone()
-            conn.commit()
-
-            if updated_id:
-                print(f"✅ Cached new AI summary in review ID {updated_id[0]} for {uni_name}.")
-            else:
-                # This case should ideally not happen if ai_processor has run, but as a fallback
-                print(f"⚠️ Could not find existing AI-processed review to update for {uni_name}. Consider running ai_processor.py.")
-                # Optionally, you could insert a new placeholder AI-processed review here
-
-            return jsonify({"summary": generated_summary}), 200
-        else:
-            return jsonify({"error": "AI summary could not be generated or was empty."}), 500
-    except Exception as e:
-        conn.rollback() # Ensure rollback on error
-        print(f"Synthesis failed for {uni_name}: {e}")
-        return jsonify({"error": "Failed to generate AI summary due to an internal error."}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+            cached_summary = cursor.fetchone()
+
+            if cached_summary and cached_summary[0]:
+                print(f"✅ Cache hit: Returning cached AI summary for {uni_name}.")
+                return jsonify({"summary": cached_summary[0]}), 200
+
+            # 2. Fall back to the last summary a background job produced for this university.
+            last_summary = get_last_summary(conn, uni_name)
+            if last_summary:
+                print(f"✅ Returning last generated AI summary for {uni_name}.")
+                return jsonify({"summary": last_summary}), 200
+
+            # 3. Otherwise start (or join) the single background job for this university.
+            print(f"⚠️ Cache miss: Queuing AI summary generation for {uni_name}...")
+            job_id = enqueue_summary_job(conn, uni_name)
+            if job_id is None:
+                return jsonify({"error": f"University {uni_name} not found or no approved reviews available."}), 404
+            return jsonify({
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": url_for('get_ai_summary_job', job_id=job_id)
+            }), 202
+        except Exception as e:
+            conn.rollback() # Ensure rollback on error
+            print(f"Synthesis failed for {uni_name}: {e}")
+            return jsonify({"error": "Failed to generate AI summary due to an internal error."}), 500
+        finally:
+            if cursor: cursor.close()
+
+@app.route('/api/summary/jobs/<uuid:job_id>', methods=['GET'])
+def get_ai_summary_job(job_id):
+    """Reports the state of a background summary job, including the summary once it is done."""
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        try:
+            job = get_summary_job(conn, str(job_id))
+            if job is None:
+                return jsonify({"error": f"Summary job {job_id} not found."}), 404
+            return jsonify(job), 200
+        except Exception as e:
+            print(f"Error fetching summary job {job_id}: {e}")
+            return jsonify({"error": "Failed to fetch summary job due to an internal error."}), 500
 
 # --- 5. Flask Routes ---
 
 @app.route('/')
 def index():
     """Test route to verify database connection status and table existence."""
-    conn = get_db_connection()
-    if conn is None:
-        return "Server is running, but **Database Connection FAILED**! Check .env and PostgreSQL setup.", 500
-
-    cursor = conn.cursor()
-    try:
-        # Attempt a simple query to ensure the table 'exchange_reviews' exists.
-        cursor.execute("SELECT COUNT(*) FROM exchange_reviews;")
-        count = cursor.fetchone()[0]
-        return f"Database Connection SUCCESS! The 'exchange_reviews' table has {count} entries. Backend is ready.", 200
-    except Exception as e:
-        # Return a more informative error if the table query fails.
-        print(f"Error querying exchange_reviews table: {e}")
-        return f"Database Connected, but Table Query FAILED. Check your table name and schema: {e}", 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+    with pooled_connection() as conn:
+        if conn is None:
+            return "Server is running, but **Database Connection FAILED**! Check .env and PostgreSQL setup.", 500
+
+        cursor = conn.cursor()
+        try:
+            # Ensure the table 'exchange_reviews' exists. The planner's row estimate avoids counting
+            # every row on each health check; it is -1 until the table is first analyzed.
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = 'exchange_reviews'::regclass;")
+            count = max(cursor.fetchone()[0], 0)
+            return f"Database Connection SUCCESS! The 'exchange_reviews' table has about {count} entries. Backend is ready.", 200
+        except Exception as e:
+            # Return a more informative error if the table query fails.
+            print(f"Error querying exchange_reviews table: {e}")
+            return f"Database Connected, but Table Query FAILED. Check your table name and schema: {e}", 500
+        finally:
+            if cursor: cursor.close()
+
+SCORE_FIELDS = ('academics_score', 'cost_score', 'social_score', 'accommodation_score')
+# Text fields of a submission; the optional ones fall back to defaults in submission_values().
+REQUIRED_TEXT_FIELDS = ('uni_name', 'raw_review_text')
+OPTIONAL_TEXT_FIELDS = ('city', 'raw_language', 'theme_summary')
+# Longest accepted value per text field: the VARCHAR sizes of migrations/0001, and for the TEXT
+# columns a bound that keeps the generated search_vector (migrations/0008) far below its 1 MB limit.
+TEXT_FIELD_MAX_LENGTHS = {
+    'uni_name': 255,
+    'city': 255,
+    'raw_language': 10,
+    'raw_review_text': 10000,
+    'theme_summary': 10000,
+}
 
 @app.route('/api/submit_review', methods=['POST'])
 def submit_review():
-    """Receives and stores a new user-submitted review."""
+    """Receives and stores a new user-submitted review.
+
+    With SUBMIT_WRITE_BEHIND=1 the review is queued durably and written to the database by a
+    background flusher: the response is 202 instead of 201. Both carry the submission_id.
+    """
     review_data = request.get_json()
-    if not review_data:
+    if not review_data or not isinstance(review_data, dict):
         return jsonify({"error": "Invalid review data provided."}), 400
 
     required_fields = ['uni_name', 'raw_review_text', 'academics_score', 'cost_score', 'social_score', 'accommodation_score']
     if not all(field in review_data for field in required_fields):
         return jsonify({"error": "Missing required review fields."}), 400
-
-    conn = get_db_connection()
-    if conn is None:
-        return jsonify({"error": "Database connection failed"}), 500
-
-    cursor = conn.cursor()
-    try:
-        sql_insert = """
-            INSERT INTO exchange_reviews (
-                uni_name, city, source_type, raw_review_text, raw_language,
-                overall_sentiment, academics_score, cost_score, social_score,
-                accommodation_score, theme_summary, reviewer_type, status, major
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-        """
-        # For user-submitted reviews, we'll use placeholder values for AI-generated fields initially.
-        # The AI processor will eventually update theme_summary based on all text.
-        # Set raw_language to 'en' by default for now, can be expanded later.
-        # overall_sentiment and theme_summary will be null/empty until ai_processor runs.
-        values = (
-            review_data['uni_name'],
-            review_data.get('city', 'Unknown'), # City might not be in submission, default to 'Unknown'
-            'user_submitted', # Mark as user submitted
-            review_data['raw_review_text'],
-            review_data.get('raw_language', 'en'), # Assume English for user input, can be enhanced
-            'Neutral', # Default sentiment for initial user reviews
-            review_data['academics_score'],
-            review_data['cost_score'],
-            review_data['social_score'],
-            review_data['accommodation_score'],
-            review_data.get('theme_summary', 'User-provided review.'), # Placeholder summary
-            'user_submitted', # Explicitly set reviewer type
-            'pending', # New reviews are pending approval
-            None # Major not collected from user reviews currently
-        )
-        
-        cursor.execute(sql_insert, values)
-        conn.commit()
-        print(f"✅ Successfully inserted user review for {review_data['uni_name']}. Status: pending")
-        return jsonify({"message": "Review submitted successfully! It is pending approval."}), 201
-    except Exception as e:
-        conn.rollback()
-        print(f"Error submitting review: {e}")
-        return jsonify({"error": "Failed to submit review due to an internal error."}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+    # Queued submissions are only written after the response, so bad scores must be caught here.
+    for field in SCORE_FIELDS:
+        score = review_data[field]
+        if isinstance(score, bool) or not isinstance(score, int) or not 1 <= score <= 5:
+            return jsonify({"error": f"{field} must be an integer from 1 to 5."}), 400
+    for field in REQUIRED_TEXT_FIELDS + OPTIONAL_TEXT_FIELDS:
+        if field not in review_data:
+            continue
+        value = review_data[field]
+        if not isinstance(value, str):
+            return jsonify({"error": f"{field} must be a string."}), 400
+        if field in REQUIRED_TEXT_FIELDS and not value.strip():
+            return jsonify({"error": f"{field} must not be empty."}), 400
+        if len(value) > TEXT_FIELD_MAX_LENGTHS[field]:
+            return jsonify({"error": f"{field} must be at most {TEXT_FIELD_MAX_LENGTHS[field]} characters."}), 400
+        # PostgreSQL text cannot hold NUL characters.
+        if '\x00' in value:
+            return jsonify({"error": f"{field} must not contain NUL characters."}), 400
+
+    submission_id = str(uuid.uuid4())
+    if SUBMIT_WRITE_BEHIND:
+        try:
+            enqueue_submission(submission_id, review_data)
+        except Exception as e:
+            print(f"Error queuing review submission: {e}")
+            return jsonify({"error": "Failed to submit review due to an internal error."}), 500
+        return jsonify({
+            "message": "Review received! It will be saved shortly and is pending approval.",
+            "submission_id": submission_id
+        }), 202
+
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        try:
+            insert_submissions(conn, [submission_values(submission_id, review_data)])
+            conn.commit()
+            print(f"✅ Successfully inserted user review for {review_data['uni_name']}. Status: pending")
+            return jsonify({"message": "Review submitted successfully! It is pending approval.", "submission_id": submission_id}), 201
+        except Exception as e:
+            conn.rollback()
+            print(f"Error submitting review: {e}")
+            return jsonify({"error": "Failed to submit review due to an internal error."}), 500
 
 @app.route('/api/university/<uni_name>', methods=['GET'])
+@conditional_on(data_version)
 def get_university_details(uni_name):
     """Fetches aggregated university details including overall score and theme summary, with caching."""
     # Check cache first
-    if uni_name in university_details_cache:
+    cached_details = university_details_cache.get(uni_name)
+    if cached_details is not None:
         print(f"✅ Cache hit for university details: {uni_name}")
-        return jsonify(university_details_cache[uni_name]), 200
+        return jsonify(cached_details), 200
 
     print(f"⚠️ Cache miss for university details: {uni_name}. Fetching from DB...")
-    conn = get_db_connection()
-    if conn is None:
-        return jsonify({"error": "Database connection failed"}), 500
-
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            SELECT
-                uni_name,
-                city,
-                ROUND(AVG(academics_score)::numeric, 2) AS avg_academics,
-                ROUND(AVG(cost_score)::numeric, 2) AS avg_cost,
-                ROUND(AVG(social_score)::numeric, 2) AS avg_social,
-                ROUND(AVG(accommodation_score)::numeric, 2) AS avg_accommodation,
-                ROUND(AVG((academics_score + cost_score + social_score + accommodation_score) / 4.0)::numeric, 2) AS overall_score,
-                major, -- Include the major column
-                -- Fetching a theme_summary, prioritizing AI-processed ones
-                (SELECT theme_summary FROM exchange_reviews WHERE uni_name = %s AND theme_summary IS NOT NULL AND reviewer_type = 'ai_processed' AND status = 'approved' LIMIT 1) AS theme_summary
-            FROM
-                exchange_reviews
-            WHERE
-                uni_name = %s AND status = 'approved'
-            GROUP BY
-                uni_name, city, major;
-        """, (uni_name, uni_name))
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        cursor = conn.cursor()
+        try:
+            # Aggregates come precomputed from university_scores (maintained by a trigger, see migrations/0003).
+            cursor.execute("""
+                SELECT
+                    uni_name,
+                    city,
+                    review_count,
+                    avg_academics,
+                    avg_cost,
+                    avg_social,
+                    avg_accommodation,
+                    ROUND(overall_score, 2) AS overall_score,
+                    -- Fetching a theme_summary, prioritizing AI-processed ones
+                    (SELECT theme_summary FROM exchange_reviews WHERE uni_name = %s AND theme_summary IS NOT NULL AND reviewer_type = 'ai_processed' AND status = 'approved' LIMIT 1) AS theme_summary
+                FROM
+                    university_scores
+                WHERE
+                    uni_name = %s;
+            """, (uni_name, uni_name))
         
-        record = cursor.fetchone()
-        print(f"Raw record from DB for {uni_name}: {record}") # DEBUG LOG
+            record = cursor.fetchone()
 
-        if record:
-            column_names = [desc[0] for desc in cursor.description]
-            university_data = dict(zip(column_names, record))
-            print(f"Aggregated university data returned: {university_data}") # DEBUG LOG
+            if record:
+                column_names = [desc[0] for desc in cursor.description]
+                university_data = dict(zip(column_names, record))
             
-            # Cache the result before returning
-            university_details_cache[uni_name] = university_data
-            print(f"✅ Cached university details for: {uni_name}")
-
-            return jsonify(university_data)
-        else:
-            return jsonify({"error": f"University {uni_name} not found or no approved reviews available."}), 404
-    except Exception as e:
-        print(f"Error fetching aggregated university details for {uni_name}: {e}")
-        return jsonify({"error": "Failed to fetch university details due to an internal error."}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+                # Cache the result before returning
+                university_details_cache.set(uni_name, university_data)
+                print(f"✅ Cached university details for: {uni_name}")
+
+                return jsonify(university_data)
+            else:
+                return jsonify({"error": f"University {uni_name} not found or no approved reviews available."}), 404
+        except Exception as e:
+            print(f"Error fetching aggregated university details for {uni_name}: {e}")
+            return jsonify({"error": "Failed to fetch university details due to an internal error."}), 500
+        finally:
+            if cursor: cursor.close()
+
+# Score dimensions compared by /api/compare: response key -> university_scores column.
+COMPARE_DIMENSIONS = {
+    'academics': 'avg_academics',
+    'cost': 'avg_cost',
+    'social': 'avg_social',
+    'accommodation': 'avg_accommodation',
+    'overall': 'overall_score',
+}
+COMPARE_MAX_UNIVERSITIES = 10
+
+# One statement for any number of universities: precomputed scores, ranks and deltas
+# (window functions over just the selected rows) and each cached AI summary, read through
+# the exchange_reviews_ai_approved_by_uni index. Deltas are relative to the first university
+# requested; ties share a rank (1, 1, 3). Every score is "higher is better", cost included.
+COMPARE_SQL = """
+    WITH selected AS (
+        SELECT s.uni_name, s.city, s.review_count, s.avg_academics, s.avg_cost, s.avg_social,
+               s.avg_accommodation, ROUND(s.overall_score, 2) AS overall_score, requested.position
+        FROM unnest(%(unis)s::text[]) WITH ORDINALITY AS requested(uni_name, position)
+        JOIN university_scores s ON s.uni_name = requested.uni_name
+    )
+    SELECT
+        selected.uni_name, selected.city, selected.review_count,
+        avg_academics, avg_cost, avg_social, avg_accommodation, overall_score,
+        RANK() OVER (ORDER BY avg_academics DESC NULLS LAST) AS rank_academics,
+        RANK() OVER (ORDER BY avg_cost DESC NULLS LAST) AS rank_cost,
+        RANK() OVER (ORDER BY avg_social DESC NULLS LAST) AS rank_social,
+        RANK() OVER (ORDER BY avg_accommodation DESC NULLS LAST) AS rank_accommodation,
+        RANK() OVER (ORDER BY overall_score DESC NULLS LAST) AS rank_overall,
+        avg_academics - FIRST_VALUE(avg_academics) OVER by_position AS delta_academics,
+        avg_cost - FIRST_VALUE(avg_cost) OVER by_position AS delta_cost,
+        avg_social - FIRST_VALUE(avg_social) OVER by_position AS delta_social,
+        avg_accommodation - FIRST_VALUE(avg_accommodation) OVER by_position AS delta_accommodation,
+        overall_score - FIRST_VALUE(overall_score) OVER by_position AS delta_overall,
+        summary.theme_summary
+    FROM selected
+    LEFT JOIN LATERAL (
+        SELECT theme_summary FROM exchange_reviews r
+        WHERE r.uni_name = selected.uni_name AND r.theme_summary IS NOT NULL
+          AND r.reviewer_type = 'ai_processed' AND r.status = 'approved'
+        ORDER BY r.id LIMIT 1
+    ) summary ON true
+    WINDOW by_position AS (ORDER BY position ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+    ORDER BY position;
+"""
+
+def parse_compare_unis():
+    """University names from ?unis=A,B,C or ?unis=A&unis=B (use the repeated form for names containing commas)."""
+    values = request.args.getlist('unis')
+    if len(values) == 1:
+        values = values[0].split(',')
+    unis = []
+    for value in values:
+        name = value.strip()
+        if name and name not in unis:
+            unis.append(name)
+    return unis
+
+@app.route('/api/compare', methods=['GET'])
+@conditional_on(data_version)
+def compare_universities():
+    """Compares two or more universities in one query: score vectors, per-dimension ranks and deltas.
+
+    Deltas are each university's score minus the first requested university's. Unknown
+    names are listed under "missing" instead of failing the whole comparison.
+    """
+    unis = parse_compare_unis()
+    if len(unis) < 2:
+        return jsonify({"error": "Provide at least two universities, e.g. ?unis=A,B."}), 400
+    if len(unis) > COMPARE_MAX_UNIVERSITIES:
+        return jsonify({"error": f"At most {COMPARE_MAX_UNIVERSITIES} universities can be compared at once."}), 400
+
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(COMPARE_SQL, {'unis': unis})
+            column_names = [desc[0] for desc in cursor.description]
+            universities = []
+            for record in cursor.fetchall():
+                row = dict(zip(column_names, record))
+                universities.append({
+                    'uni_name': row['uni_name'],
+                    'city': row['city'],
+                    'review_count': row['review_count'],
+                    **{column: row[column] for column in COMPARE_DIMENSIONS.values()},
+                    'theme_summary': row['theme_summary'],
+                    'ranks': {dimension: row[f'rank_{dimension}'] for dimension in COMPARE_DIMENSIONS},
+                    'deltas': {dimension: row[f'delta_{dimension}'] for dimension in COMPARE_DIMENSIONS},
+                })
+        except Exception as e:
+            print(f"Error comparing universities {unis}: {e}")
+            return jsonify({"error": "Failed to compare universities due to an internal error."}), 500
+        finally:
+            if cursor: cursor.close()
+
+    if not universities:
+        return jsonify({"error": "None of the requested universities was found or has approved reviews."}), 404
+    found = {university['uni_name'] for university in universities}
+    return jsonify({
+        "universities": universities,
+        "reference": universities[0]['uni_name'],
+        "missing": [name for name in unis if name not in found]
+    })
+
+# Score dimensions ranked by /api/rankings: query value -> stored average column of
+# university_stats / university_major_stats (migrations/0012).
+RANKING_DIMENSIONS = {
+    'academics': 'avg_academics',
+    'cost': 'avg_cost',
+    'social': 'avg_social',
+    'accommodation': 'avg_accommodation',
+    'overall': 'avg_overall',
+}
+RANKING_DEFAULT_K = 10
+RANKING_MAX_K = 100
+# Fewest scored reviews a university needs to be ranked. The ranking indexes of migrations/0012
+# are partial on this value; a lower threshold needs new indexes, a higher one is a ?min_reviews= away.
+RANKING_MIN_REVIEWS = 3
+# scored_count is an INTEGER column; larger thresholds could never match.
+RANKING_MAX_MIN_REVIEWS = 2**31 - 1
+
+def ranking_sql(dimension, by_major):
+    """Top-k query for one dimension, optionally within a major: an index scan of at most k + 1 rows.
+
+    Rows tied on the score are ordered by scored_count, then name, matching the index order.
+    """
+    column = RANKING_DIMENSIONS[dimension]
+    table = 'university_major_stats' if by_major else 'university_stats'
+    major_filter = 'major = %(major)s AND ' if by_major else ''
+    return f"""
+        SELECT uni_name, city, review_count, scored_count, avg_academics, avg_cost,
+               avg_social, avg_accommodation, avg_overall, {column} AS score
+        FROM {table}
+        WHERE {major_filter}scored_count >= %(min_reviews)s
+        ORDER BY {column} DESC, scored_count DESC, uni_name
+        LIMIT %(limit)s;
+    """
+
+@app.route('/api/rankings', methods=['GET'])
+@conditional_on(data_version)
+def get_rankings():
+    """Best k universities for one score dimension, optionally among reviews from one major.
+
+    Universities with the same (rounded) score share a rank (1, 2, 2, 4). When the cut-off at k
+    falls inside such a tie, "ties_truncated" is true: more universities share the last rank.
+    """
+    dimension = request.args.get('dimension', 'overall')
+    if dimension not in RANKING_DIMENSIONS:
+        return jsonify({"error": f"dimension must be one of: {', '.join(RANKING_DIMENSIONS)}."}), 400
+    major = request.args.get('major') or None
+    try:
+        k = parse_limit(request.args.get('k'), RANKING_DEFAULT_K, RANKING_MAX_K)
+        min_reviews = int(request.args.get('min_reviews', RANKING_MIN_REVIEWS))
+    except (PaginationError, ValueError):
+        return jsonify({"error": "k and min_reviews must be integers."}), 400
+    if not RANKING_MIN_REVIEWS <= min_reviews <= RANKING_MAX_MIN_REVIEWS:
+        return jsonify({"error": f"min_reviews must be between {RANKING_MIN_REVIEWS} and {RANKING_MAX_MIN_REVIEWS}."}), 400
+
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        cursor = conn.cursor()
+        try:
+            # One row beyond k shows whether the last rank continues past the cut-off.
+            cursor.execute(ranking_sql(dimension, major is not None), {'major': major, 'min_reviews': min_reviews, 'limit': k + 1})
+            column_names = [desc[0] for desc in cursor.description]
+            rows = [dict(zip(column_names, record)) for record in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error ranking universities by {dimension} (major: {major}): {e}")
+            return jsonify({"error": "Failed to rank universities due to an internal error."}), 500
+        finally:
+            if cursor: cursor.close()
+
+    rankings = []
+    for position, row in enumerate(rows[:k], 1):
+        # Standard competition ranking: a tie keeps the rank of its first member.
+        rank = rankings[-1]['rank'] if rankings and row['score'] == rankings[-1]['score'] else position
+        rankings.append({'rank': rank, **row})
+    return jsonify({
+        "dimension": dimension,
+        "major": major,
+        "k": k,
+        "min_reviews": min_reviews,
+        "rankings": rankings,
+        "ties_truncated": len(rows) > k and rows[k]['score'] == rows[k - 1]['score']
+    })
 
 @app.route('/api/unis', methods=['GET'])
+@conditional_on(data_version)
 def get_unis_live():
     """Fetches all processed university reviews from the PostgreSQL database, with optional major filtering."""
-    conn = get_db_connection()
-    if conn is None:
-        return jsonify({"error": "Database connection failed"}), 500
-
-    cursor = conn.cursor()
-    try:
-        # Get optional major filter from query parameters
-        filter_major = request.args.get('major')
-
-        sql_query = """
-            SELECT
-                uni_name,
-                city,
-                COUNT(*) AS review_count,
-                ROUND(AVG(academics_score)::numeric, 2) AS avg_academics,
-                ROUND(AVG(cost_score)::numeric, 2) AS avg_cost,
-                ROUND(AVG(social_score)::numeric, 2) AS avg_social,
-                ROUND(AVG(accommodation_score)::numeric, 2) AS avg_accommodation,
-                AVG((academics_score + cost_score + social_score + accommodation_score) / 4.0)::numeric AS overall_score,
-                major -- Include the major column
-            FROM
-                exchange_reviews
-            WHERE
-                status = 'approved'
-        """
-        query_params = []
-
-        if filter_major:
-            sql_query += " AND %s = ANY(major)"
-            query_params.append(filter_major)
-        
-        sql_query += " GROUP BY uni_name, city, major;"
-
-        cursor.execute(sql_query, query_params)
-        records = cursor.fetchall()
-
-        # Get column names dynamically for flexible JSON conversion.
-        column_names = [desc[0] for desc in cursor.description]
-        unis_data = []
-        for record in records:
-            unis_data.append(dict(zip(column_names, record)))
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        cursor = conn.cursor()
+        try:
+            # Get optional major filter from query parameters
+            filter_major = request.args.get('major')
+
+            if not filter_major:
+                # Unfiltered map view: one precomputed row per university (see migrations/0003).
+                sql_query = """
+                    SELECT
+                        uni_name, city, review_count, avg_academics, avg_cost,
+                        avg_social, avg_accommodation, overall_score
+                    FROM university_scores
+                    ORDER BY uni_name;
+                """
+                query_params = []
+            else:
+                # Filtered map view: one precomputed row per university for this major, read in
+                # order from the (major, uni_name) primary key of university_major_stats (migrations/0012).
+                # Same columns as the unfiltered view; a review counts once per distinct major it lists.
+                sql_query = """
+                    SELECT
+                        uni_name, city, review_count, avg_academics, avg_cost,
+                        avg_social, avg_accommodation,
+                        (sum_academics + sum_cost + sum_social + sum_accommodation)::numeric / NULLIF(scored_count * 4, 0) AS overall_score
+                    FROM university_major_stats
+                    WHERE major = %s AND review_count > 0
+                    ORDER BY uni_name;
+                """
+                query_params = [filter_major]
+
+            cursor.execute(sql_query, query_params)
+            records = cursor.fetchall()
+
+            # Get column names dynamically for flexible JSON conversion.
+            column_names = [desc[0] for desc in cursor.description]
+            unis_data = []
+            for record in records:
+                unis_data.append(dict(zip(column_names, record)))
         
-        return jsonify(unis_data)
-    except Exception as e:
-        print(f"Error querying database for universities: {e}")
-        return jsonify({"error": "Failed to fetch university data from the database."}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+            return jsonify(unis_data)
+        except Exception as e:
+            print(f"Error querying database for universities: {e}")
+            return jsonify({"error": "Failed to fetch university data from the database."}), 500
+        finally:
+            if cursor: cursor.close()
+
+# Columns a client may request from /api/reviews via ?fields=.
+REVIEW_FIELDS = (
+    'id', 'uni_name', 'raw_review_text', 'academics_score', 'cost_score',
+    'social_score', 'accommodation_score', 'reviewer_type'
+)
+REVIEWS_DEFAULT_PAGE_SIZE = 20
+REVIEWS_MAX_PAGE_SIZE = 100
 
 @app.route('/api/reviews/<uni_name>', methods=['GET'])
 def get_individual_reviews(uni_name):
-    """Fetches all individual reviews for a specific university."""
-    conn = get_db_connection()
-    if conn is None:
-        return jsonify({"error": "Database connection failed"}), 500
+    """Fetches individual approved reviews for a specific university, newest first.
+
+    Optional query parameters:
+      - fields: comma-separated projection, e.g. fields=id,raw_review_text
+      - limit / cursor: keyset pagination on id. When either is given the response is
+        {"reviews": [...], "next_cursor": "..."} and next_cursor is null on the last page.
+    Without limit or cursor the full list is returned as a plain array, as before.
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'), REVIEW_FIELDS)
+        paginated = 'limit' in request.args or 'cursor' in request.args
+        limit = parse_limit(request.args.get('limit'), REVIEWS_DEFAULT_PAGE_SIZE, REVIEWS_MAX_PAGE_SIZE)
+        cursor_token = request.args.get('cursor')
+        before_id = decode_cursor(cursor_token, 1)[0] if cursor_token else None
+        # bool is a subclass of int, but [true] is not a valid cursor.
+        if before_id is not None and (isinstance(before_id, bool) or not isinstance(before_id, int)):
+            raise PaginationError("Invalid cursor.")
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        cursor = conn.cursor()
+        try:
+            # id is always selected because the next cursor is built from it.
+            selected_columns = fields if 'id' in fields else ['id'] + fields
+            # Use a parameterized query to prevent SQL injection; column names come from the REVIEW_FIELDS whitelist.
+            sql_query = f"SELECT {', '.join(selected_columns)} FROM exchange_reviews WHERE uni_name = %s AND status = 'approved'"
+            query_params = [uni_name]
+            if before_id is not None:
+                sql_query += " AND id < %s"
+                query_params.append(before_id)
+            sql_query += " ORDER BY id DESC"
+            if paginated:
+                # Fetch one extra row to learn whether another page exists.
+                sql_query += " LIMIT %s"
+                query_params.append(limit + 1)
+
+            cursor.execute(sql_query + ";", query_params)
+            records = cursor.fetchall()
+            column_names = [desc[0] for desc in cursor.description]
+
+            next_cursor = None
+            if paginated and len(records) > limit:
+                records = records[:limit]
+                next_cursor = encode_cursor([records[-1][0]])
+
+            reviews_data = []
+            for record in records:
+                review = dict(zip(column_names, record))
+                if 'id' not in fields:
+                    del review['id']
+                reviews_data.append(review)
+
+            if paginated:
+                return jsonify({"reviews": reviews_data, "next_cursor": next_cursor})
+            return jsonify(reviews_data)
+        except Exception as e:
+            print(f"Error querying reviews for {uni_name}: {e}")
+            return jsonify({"error": "Failed to fetch reviews for the specified university."}), 500
+        finally:
+            if cursor: cursor.close()
+
+SEARCH_DEFAULT_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+SEARCH_MAX_QUERY_LENGTH = 200
+# Matching reviews ranked per request: the newest SEARCH_MAX_CANDIDATES matches (by id) are
+# ranked and the best of those returned, so older reviews of very common terms are never ranked.
+# The cap is deterministic, so every page of a search is cut from the same candidates, and
+# responses say "truncated": true when it applied. Ranking every match instead costs ~0.9 s
+# for a term found in 125k of 1M reviews.
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "1000"))
+# University names suggested for the query, matched by trigram similarity (migrations/0009).
+SEARCH_MAX_UNIVERSITIES = 5
+# Responses keyed by (data version, URL): popular searches skip the database, and any change to
+# approved reviews moves to a new version, so stale results are never served.
+search_results_cache = TTLCache(
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "60"))
+)
+
+# The search terms are parsed with both text-search configurations used by search_vector
+# (migrations/0008) and OR-ed, so English stems and Arabic stems both match. MATERIALIZED hides
+# the terms from the planner, so matches are always found through the search_vector index: a
+# backward id scan looks cheap for common terms but walks the whole table for misspelled ones.
+# Rank is computed only for the capped candidates.
+SEARCH_REVIEWS_SQL = """
+    WITH query AS MATERIALIZED (
+        SELECT websearch_to_tsquery('english', %(q)s) || websearch_to_tsquery('arabic', %(q)s) AS tsq
+    ), newest AS (
+        SELECT r.id, r.uni_name, r.city, r.raw_review_text, r.search_vector
+        FROM exchange_reviews r CROSS JOIN query
+        WHERE r.search_vector @@ query.tsq AND r.status = 'approved' {uni_filter}
+        ORDER BY r.id DESC
+        LIMIT %(max_candidates)s + 1  -- one extra match shows whether the cap applied
+    ), candidates AS (
+        SELECT capped.id, capped.uni_name, capped.city, capped.raw_review_text,
+               ts_rank_cd(capped.search_vector, query.tsq) AS rank
+        FROM (SELECT * FROM newest ORDER BY id DESC LIMIT %(max_candidates)s) capped CROSS JOIN query
+    ), page AS (
+        SELECT * FROM candidates
+        {cursor_filter}
+        ORDER BY rank DESC, id DESC
+        LIMIT %(limit)s
+    )
+    -- Snippets are only built for the rows actually returned. The LEFT JOIN keeps one row
+    -- (with a NULL id) when the page is empty, so "truncated" is always reported.
+    SELECT page.id, page.uni_name, page.city, page.raw_review_text,
+           ts_headline('english', page.raw_review_text, query.tsq, 'MaxWords=30, MinWords=12, MaxFragments=1') AS snippet,
+           page.rank, capped.truncated
+    FROM (SELECT count(*) > %(max_candidates)s AS truncated FROM newest) capped
+    LEFT JOIN (page CROSS JOIN query) ON true
+    ORDER BY page.rank DESC, page.id DESC;
+"""
+
+SEARCH_UNIVERSITIES_SQL = """
+    SELECT uni_name, city, review_count, word_similarity(%(q)s, uni_name) AS similarity
+    FROM university_stats
+    WHERE review_count > 0 AND %(q)s <%% uni_name
+    ORDER BY similarity DESC, uni_name
+    LIMIT %(max_universities)s;
+"""
+
+@app.route('/api/search', methods=['GET'])
+@conditional_on(data_version)
+def search_reviews():
+    """Searches approved review text (English and Arabic) and university names.
+
+    Query parameters:
+      - q: the search terms (required); supports "quoted phrases", OR and -exclusions.
+      - uni: only search reviews of this university.
+      - limit / cursor: pagination over the ranked results.
+    Returns {"universities": [...], "reviews": [...], "next_cursor": "...", "truncated": false},
+    where reviews are ordered by relevance and universities (first page only) are typo-tolerant
+    name matches. "truncated" is true when more than SEARCH_MAX_CANDIDATES reviews matched, so
+    only the newest of them were ranked.
+    """
+    search_terms = (request.args.get('q') or '').strip()
+    if not search_terms:
+        return jsonify({"error": "Missing search query parameter 'q'."}), 400
+    if len(search_terms) > SEARCH_MAX_QUERY_LENGTH:
+        return jsonify({"error": f"Search query must be at most {SEARCH_MAX_QUERY_LENGTH} characters."}), 400
 
-    cursor = conn.cursor()
     try:
-        # Use a parameterized query to prevent SQL injection and filter reviews by university name.
-        cursor.execute(
-            "SELECT id, uni_name, raw_review_text, academics_score, cost_score, social_score, accommodation_score, reviewer_type FROM exchange_reviews WHERE uni_name = %s AND status = 'approved' ORDER BY id DESC;",
-            (uni_name,)
-        )
-        records = cursor.fetchall()
-        column_names = [desc[0] for desc in cursor.description]
-
-        reviews_data = []
-        for record in records:
-            reviews_data.append(dict(zip(column_names, record)))
-        
-        return jsonify(reviews_data)
-    except Exception as e:
-        print(f"Error querying reviews for {uni_name}: {e}")
-        return jsonify({"error": "Failed to fetch reviews for the specified university."}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+        limit = parse_limit(request.args.get('limit'), SEARCH_DEFAULT_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+        cursor_token = request.args.get('cursor')
+        after = decode_cursor(cursor_token, 2) if cursor_token else None
+        if after is not None and (
+            isinstance(after[0], bool) or isinstance(after[1], bool)
+            or not (isinstance(after[0], (int, float)) and isinstance(after[1], int))
+        ):
+            raise PaginationError("Invalid cursor.")
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version, _ = data_version.current()
+    cache_key = (version, request.full_path)
+    if version is not None:
+        cached_results = search_results_cache.get(cache_key)
+        if cached_results is not None:
+            return jsonify(cached_results)
+
+    uni_name = request.args.get('uni')
+    query_params = {
+        'q': search_terms,
+        'uni_name': uni_name,
+        'max_candidates': SEARCH_MAX_CANDIDATES,
+        'max_universities': SEARCH_MAX_UNIVERSITIES,
+        # Fetch one extra row to learn whether another page exists.
+        'limit': limit + 1,
+    }
+    sql_query = SEARCH_REVIEWS_SQL.format(
+        uni_filter="AND r.uni_name = %(uni_name)s" if uni_name else "",
+        # ts_rank_cd returns real; compare in real so the cursor row itself is excluded exactly.
+        cursor_filter="WHERE (rank, id) < (%(after_rank)s::real, %(after_id)s)" if after else ""
+    )
+    if after:
+        query_params['after_rank'], query_params['after_id'] = after
+
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql_query, query_params)
+            records = cursor.fetchall()
+            column_names = [desc[0] for desc in cursor.description]
+            truncated = bool(records) and records[0][-1]
+            column_names = column_names[:-1]
+            records = [record[:-1] for record in records if record[0] is not None]
+
+            next_cursor = None
+            if len(records) > limit:
+                records = records[:limit]
+                last = dict(zip(column_names, records[-1]))
+                next_cursor = encode_cursor([last['rank'], last['id']])
+
+            universities = []
+            if after is None:
+                cursor.execute(SEARCH_UNIVERSITIES_SQL, query_params)
+                university_columns = [desc[0] for desc in cursor.description]
+                universities = [dict(zip(university_columns, record)) for record in cursor.fetchall()]
+
+            search_results = {
+                "universities": universities,
+                "reviews": [dict(zip(column_names, record)) for record in records],
+                "next_cursor": next_cursor,
+                "truncated": truncated
+            }
+            if version is not None:
+                search_results_cache.set(cache_key, search_results)
+            return jsonify(search_results)
+        except Exception as e:
+            print(f"Error searching reviews for '{search_terms}': {e}")
+            return jsonify({"error": "Failed to search reviews."}), 500
+        finally:
+            if cursor: cursor.close()
 
 @app.route('/api/admin/reviews/<int:review_id>/status', methods=['PUT'])
 def update_review_status(review_id):
@@ -362,38 +787,35 @@ def update_review_status(review_id):
     if new_status not in ['approved', 'rejected']:
         return jsonify({"error": "Invalid status provided. Must be 'approved' or 'rejected'."}), 400
 
-    conn = get_db_connection()
-    if conn is None:
-        return jsonify({"error": "Database connection failed"}), 500
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
 
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            "UPDATE exchange_reviews SET status = %s WHERE id = %s;",
-            (new_status, review_id)
-        )
-        conn.commit()
-        if cursor.rowcount == 0:
-            return jsonify({"error": f"Review with ID {review_id} not found."}), 404
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "UPDATE exchange_reviews SET status = %s WHERE id = %s RETURNING uni_name;",
+                (new_status, review_id)
+            )
+            uni_name_result = cursor.fetchone()
+            conn.commit()
+            if uni_name_result is None:
+                return jsonify({"error": f"Review with ID {review_id} not found."}), 404
         
-        # Invalidate cache for the affected university
-        cursor.execute("SELECT uni_name FROM exchange_reviews WHERE id = %s;", (review_id,))
-        uni_name_result = cursor.fetchone()
-        if uni_name_result:
+            # Invalidate this worker's cache right away; other workers are notified by the
+            # database trigger (migrations/0004) once the update has committed.
             affected_uni_name = uni_name_result[0]
-            if affected_uni_name in university_details_cache:
-                del university_details_cache[affected_uni_name]
+            if university_details_cache.delete(affected_uni_name):
                 print(f"✅ Cache invalidated for university: {affected_uni_name} due to review status change.")
 
-        print(f"✅ Successfully updated status for review ID {review_id} to {new_status}.")
-        return jsonify({"message": f"Review {review_id} status updated to {new_status}."}), 200
-    except Exception as e:
-        conn.rollback()
-        print(f"Error updating review status for ID {review_id}: {e}")
-        return jsonify({"error": "Failed to update review status due to an internal error."}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+            print(f"✅ Successfully updated status for review ID {review_id} to {new_status}.")
+            return jsonify({"message": f"Review {review_id} status updated to {new_status}."}), 200
+        except Exception as e:
+            conn.rollback()
+            print(f"Error updating review status for ID {review_id}: {e}")
+            return jsonify({"error": "Failed to update review status due to an internal error."}), 500
+        finally:
+            if cursor: cursor.close()
 
 @app.route('/api/admin/reviews/pending', methods=['GET'])
 def get_pending_reviews_endpoint():
@@ -404,50 +826,65 @@ def get_pending_reviews_endpoint():
     if not ADMIN_API_KEY or incoming_api_key != ADMIN_API_KEY:
         return jsonify({"error": "Unauthorized: Invalid API Key"}), 401
     
-    conn = get_db_connection()
-    if conn is None:
-        return jsonify({"error": "Database connection failed"}), 500
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
 
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            "SELECT id, uni_name, raw_review_text, reviewer_type FROM exchange_reviews WHERE status = 'pending' ORDER BY id ASC;"
-        )
-        records = cursor.fetchall()
-        column_names = [desc[0] for desc in cursor.description]
-
-        pending_reviews_data = []
-        for record in records:
-            pending_reviews_data.append(dict(zip(column_names, record)))
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT id, uni_name, raw_review_text, reviewer_type FROM exchange_reviews WHERE status = 'pending' ORDER BY id ASC;"
+            )
+            records = cursor.fetchall()
+            column_names = [desc[0] for desc in cursor.description]
+
+            pending_reviews_data = []
+            for record in records:
+                pending_reviews_data.append(dict(zip(column_names, record)))
         
-        return jsonify(pending_reviews_data), 200
-    except Exception as e:
-        print(f"Error fetching pending reviews for admin: {e}")
-        return jsonify({"error": "Failed to fetch pending reviews due to an internal error."}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+            return jsonify(pending_reviews_data), 200
+        except Exception as e:
+            print(f"Error fetching pending reviews for admin: {e}")
+            return jsonify({"error": "Failed to fetch pending reviews due to an internal error."}), 500
+        finally:
+            if cursor: cursor.close()
 
 @app.route('/api/majors', methods=['GET'])
+@conditional_on(data_version)
 def get_majors():
     """Fetches a distinct list of all majors from approved reviews."""
-    conn = get_db_connection()
-    if conn is None:
-        return jsonify({"error": "Database connection failed"}), 500
-
-    cursor = conn.cursor()
-    try:
-        # Ensure we only fetch majors from approved reviews that actually have major data
-        cursor.execute("SELECT DISTINCT unnest(major) FROM exchange_reviews WHERE status = 'approved' AND major IS NOT NULL AND major != '{}';")
-        majors = [row[0] for row in cursor.fetchall()]
-        majors.sort() # Sort alphabetically for consistent display
-        return jsonify(majors), 200
-    except Exception as e:
-        print(f"Error fetching majors: {e}")
-        return jsonify({"error": "Failed to fetch majors due to an internal error."}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+    with pooled_connection() as conn:
+        if conn is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        cursor = conn.cursor()
+        try:
+            # Ensure we only fetch majors from approved reviews that actually have major data.
+            # Few distinct major arrays exist, so a recursive skip scan over the
+            # exchange_reviews_approved_major_values index (migrations/0010) visits each one once
+            # instead of reading every approved review.
+            cursor.execute("""
+                WITH RECURSIVE major_arrays AS (
+                    (SELECT major FROM exchange_reviews
+                     WHERE status = 'approved' AND major IS NOT NULL AND major <> '{}'
+                     ORDER BY major LIMIT 1)
+                    UNION ALL
+                    SELECT (SELECT r.major FROM exchange_reviews r
+                            WHERE r.status = 'approved' AND r.major IS NOT NULL AND r.major <> '{}' AND r.major > m.major
+                            ORDER BY r.major LIMIT 1)
+                    FROM major_arrays m
+                    WHERE m.major IS NOT NULL
+                )
+                SELECT DISTINCT unnest(major) FROM major_arrays WHERE major IS NOT NULL;
+            """)
+            majors = [row[0] for row in cursor.fetchall()]
+            majors.sort() # Sort alphabetically for consistent display
+            return jsonify(majors), 200
+        except Exception as e:
+            print(f"Error fetching majors: {e}")
+            return jsonify({"error": "Failed to fetch majors due to an internal error."}), 500
+        finally:
+            if cursor: cursor.close()
 
 # --- 6. Run Application ---
 if __name__ == '__main__':
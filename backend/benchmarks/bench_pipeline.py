@@ -0,0 +1,118 @@
+"""Offline throughput of the AI import pipeline against the local Gemini stand-in.
+
+Runs synthetic reviews through ai_processor.iter_enriched_records (batching, parallel
+calls, rate limiting, retries and the analysis cache), with Gemini replaced by
+benchmarks/gemini_stub.py. No network access, API key or database is needed, and
+seeded faults make runs repeatable. The second pass reuses the analysis cache of the first.
+
+    python benchmarks/bench_pipeline.py [--reviews 500] [--batch-size 10] [--concurrency 4] [--rpm 600]
+                                        [--latency-ms 800] [--latency-dist lognormal] [--error-429 0.05]
+                                        [--error-500 0.01] [--stand-in-rpm 0] [--backend http] [--json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.gemini_stub import LATENCY_DISTRIBUTIONS, start_stub_server
+
+CITIES = ["Trier", "Bremen", "Stralsund", "Fulda", "Bayreuth", "Krefeld"]
+SENTENCES = [
+    "The academics were top-tier, definitely worth the hassle.",
+    "Rent is average for a German city, but the transport system is excellent.",
+    "الجامعة هادئة جداً، السكن رخيص والناس ودودون لكن لا يوجد حياة ليلية.",
+    "The student life is active, but be prepared for high rent and long queues.",
+]
+
+
+def synthetic_rows(count):
+    for index in range(count):
+        city = CITIES[index % len(CITIES)]
+        yield {
+            "uni_name": f"University of {city} {index % 40}",
+            "city": city,
+            "raw_review_text": f"{SENTENCES[index % len(SENTENCES)]} {SENTENCES[(index // 4) % len(SENTENCES)]} (review {index})",
+            "source_type": "bench_pipeline",
+        }
+
+
+def run_pass(ai_processor, stand_in, reviews):
+    """Runs the pipeline once; returns its timing and the stand-in's counters for that pass."""
+    stand_in.stats.reset()
+    start = time.perf_counter()
+    # The pipeline reports every review on stdout; keep the benchmark output readable.
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        records = sum(1 for _ in ai_processor.iter_enriched_records(synthetic_rows(reviews)))
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 3),
+        "records": records,
+        "failed": reviews - records,
+        "reviews_per_second": round(reviews / seconds, 1),
+        "backoffs": log.getvalue().count("backing off"),
+        "stand_in": stand_in.stats.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reviews", type=int, default=500, help="synthetic reviews per pass")
+    parser.add_argument("--passes", type=int, default=2, help="passes over the same reviews (later ones hit the analysis cache)")
+    parser.add_argument("--batch-size", type=int, default=10, help="GEMINI_BATCH_SIZE")
+    parser.add_argument("--concurrency", type=int, default=4, help="GEMINI_MAX_CONCURRENCY")
+    parser.add_argument("--rpm", type=int, default=600, help="GEMINI_RPM of the client-side rate limiter")
+    parser.add_argument("--tpm", type=int, default=4_000_000, help="GEMINI_TPM of the client-side rate limiter")
+    parser.add_argument("--no-cache", action="store_true", help="disable the analysis cache")
+    parser.add_argument("--backend", default="http", help="LLM_BACKEND: 'http' or 'gemini' (SDK over REST)")
+    parser.add_argument("--latency-ms", type=float, default=800, help="mean stand-in latency")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--error-429", type=float, default=0.0, help="share of calls the stand-in rejects with 429")
+    parser.add_argument("--error-500", type=float, default=0.0, help="share of calls the stand-in fails with 500")
+    parser.add_argument("--stand-in-rpm", type=int, default=0, help="quota enforced by the stand-in (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    stand_in = start_stub_server(
+        latency_ms=args.latency_ms, latency_dist=args.latency_dist, error_429=args.error_429,
+        error_500=args.error_500, rpm=args.stand_in_rpm, seed=args.seed
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # gemini_client reads its settings at import time, so they are set before importing the pipeline.
+        os.environ.update({
+            "LLM_BACKEND": args.backend,
+            "GEMINI_API_ENDPOINT": f"http://127.0.0.1:{stand_in.server_port}",
+            "GEMINI_API_KEY": "stand-in",
+            "GEMINI_BATCH_SIZE": str(args.batch_size),
+            "GEMINI_MAX_CONCURRENCY": str(args.concurrency),
+            "GEMINI_RPM": str(args.rpm),
+            "GEMINI_TPM": str(args.tpm),
+            "GEMINI_CACHE_ENABLED": "0" if args.no_cache else "1",
+            "GEMINI_CACHE_PATH": os.path.join(cache_dir, "gemini_analysis.sqlite3"),
+        })
+        import ai_processor
+
+        passes = [run_pass(ai_processor, stand_in, args.reviews) for _ in range(args.passes)]
+    stand_in.shutdown()
+
+    results = {"settings": vars(args), "passes": passes}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.reviews} reviews, batches of {args.batch_size}, {args.concurrency} concurrent calls, "
+          f"{args.latency_dist} latency (mean {args.latency_ms:.0f} ms), 429 {args.error_429:.0%}, 500 {args.error_500:.0%}")
+    for number, run in enumerate(passes, 1):
+        stats = run["stand_in"]
+        print(f"  pass {number}: {run['seconds']:8.2f} s {run['reviews_per_second']:8.1f} reviews/s  "
+              f"{run['failed']} failed  {run['backoffs']} backoffs  calls {stats['requests']}  {stats['total_tokens']} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Bytes and CPU per response for the /api/unis and /api/reviews payloads.
+
+Compares Flask's default JSON provider with FastJSONProvider, each sent as identity,
+gzip and brotli, on synthetic rows shaped exactly like the route output. No database
+or network is needed.
+
+    python benchmarks/bench_responses.py [--unis 60] [--reviews 500] [--repeat 200] [--json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import decimal
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import compression
+from serialization import FastJSONProvider
+
+LOREM = (
+    "The campus is modern and the professors are helpful, but finding a flat took weeks. "
+    "Rent is high compared to the smaller towns and the student dorms fill up quickly. "
+)
+
+
+def make_unis_payload(count):
+    """Rows as returned by get_unis_live (university_scores has Decimal averages)."""
+    rows = []
+    for index in range(count):
+        scores = [decimal.Decimal(random.randint(100, 500)) / 100 for _ in range(4)]
+        rows.append({
+            "uni_name": f"University {index}",
+            "city": f"City {index % 40}",
+            "review_count": random.randint(1, 400),
+            "avg_academics": scores[0],
+            "avg_cost": scores[1],
+            "avg_social": scores[2],
+            "avg_accommodation": scores[3],
+            "overall_score": sum(scores) / 4,
+        })
+    return rows
+
+
+def make_reviews_payload(count):
+    """Rows as returned by get_individual_reviews."""
+    return [{
+        "id": 100000 - index,
+        "uni_name": "University 1",
+        "raw_review_text": LOREM[:random.randint(60, len(LOREM))],
+        "academics_score": random.randint(1, 5),
+        "cost_score": random.randint(1, 5),
+        "social_score": random.randint(1, 5),
+        "accommodation_score": random.randint(1, 5),
+        "reviewer_type": random.choice(["ai_processed", "user_submitted"]),
+    } for index in range(count)]
+
+
+def measure(provider, payload, encoding, repeat):
+    """Returns (bytes on the wire, CPU microseconds per response) for one combination."""
+    start = time.process_time()
+    for _ in range(repeat):
+        body = provider.response(payload).get_data()
+        if encoding != "identity":
+            body = compression.compress_body(body, encoding)
+    cpu_us = (time.process_time() - start) / repeat * 1e6
+    return len(body), cpu_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--unis", type=int, default=60, help="rows in the /api/unis payload")
+    parser.add_argument("--reviews", type=int, default=500, help="rows in the /api/reviews payload")
+    parser.add_argument("--repeat", type=int, default=200, help="responses built per measurement")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    random.seed(42)
+    app = Flask(__name__)
+    providers = {"flask-default": DefaultJSONProvider(app), "fast": FastJSONProvider(app)}
+    payloads = {"/api/unis": make_unis_payload(args.unis), "/api/reviews": make_reviews_payload(args.reviews)}
+    encodings = ["identity", "gzip"] + (["br"] if compression.brotli is not None else [])
+
+    results = []
+    with app.app_context():
+        for endpoint, payload in payloads.items():
+            for provider_name, provider in providers.items():
+                for encoding in encodings:
+                    size, cpu_us = measure(provider, payload, encoding, args.repeat)
+                    results.append({
+                        "endpoint": endpoint, "serializer": provider_name, "encoding": encoding,
+                        "bytes": size, "cpu_us": round(cpu_us, 1)
+                    })
+
+    if args.json:
+        print(json.dumps({"rows": {"unis": args.unis, "reviews": args.reviews}, "results": results}, indent=2))
+        return
+
+    print(f"{'endpoint':<14}{'serializer':<15}{'encoding':<10}{'bytes':>10}{'CPU µs':>10}")
+    for row in results:
+        print(f"{row['endpoint']:<14}{row['serializer']:<15}{row['encoding']:<10}{row['bytes']:>10}{row['cpu_us']:>10}")
+
+
+if __name__ == "__main__":
+    main()
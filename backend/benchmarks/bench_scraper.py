@@ -0,0 +1,123 @@
+"""Throughput of the HTML review scraper modes on a synthetic page with 100k review cards.
+
+Times each extractor in review_sources (bs4, stream, lxml) on one large file, checks
+they all return the same records, then times scrape_html_directory on the same cards
+split across several files, sequentially and with one process per CPU.
+
+    python benchmarks/bench_scraper.py [--cards 100000] [--files 8] [--modes bs4,stream,lxml] [--json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import review_sources
+
+CITIES = ["Trier", "Bremen", "Stralsund", "Fulda", "Bayreuth", "Krefeld"]
+SENTENCES = [
+    "The academics were top-tier, definitely worth the hassle.",
+    "Rent is average for a German city, but the transport system is excellent.",
+    "الجامعة هادئة جداً، السكن رخيص والناس ودودون لكن لا يوجد حياة ليلية.",
+    "The student life is active, but be prepared for high rent &amp; long queues.",
+]
+
+
+def card_html(index):
+    city = random.choice(CITIES)
+    body = " ".join(random.sample(SENTENCES, 2))
+    # Every so often a card has no city, or extra markup inside the review.
+    city_html = f'        <p class="uni-city">{city}</p>\n' if index % 17 else ""
+    if index % 11 == 0:
+        body = f"<b>Short version:</b> {body} <!-- moderator note -->"
+    return (
+        '    <div class="uni-review-card">\n'
+        f'        <h4 class="uni-name">University of {city} {index % 500}</h4>\n'
+        f'{city_html}'
+        f'        <p class="review-body">{body}</p>\n'
+        '    </div>\n'
+    )
+
+
+def write_pages(directory, cards, files):
+    """Writes `cards` cards spread over `files` pages and returns their paths."""
+    paths = []
+    per_file = -(-cards // files)
+    for file_index in range(files):
+        path = os.path.join(directory, f"reviews_{file_index:03d}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="UTF-8"><title>Reviews</title></head>\n<body>\n')
+            for index in range(file_index * per_file, min(cards, (file_index + 1) * per_file)):
+                f.write(card_html(index))
+            f.write("</body>\n</html>\n")
+        paths.append(path)
+    return paths
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=100_000, help="review cards to generate")
+    parser.add_argument("--files", type=int, default=8, help="files for the directory benchmark")
+    parser.add_argument("--modes", default="bs4,stream,lxml", help="comma-separated extractors to time")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    random.seed(42)
+    modes = [mode for mode in args.modes.split(",") if mode]
+    if "lxml" in modes and review_sources.etree is None:
+        print("⚠️ lxml is not installed; skipping the lxml mode.", file=sys.stderr)
+        modes.remove("lxml")
+
+    results = {"cards": args.cards, "single_file": [], "directory": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        single_dir = os.path.join(tmp, "single")
+        split_dir = os.path.join(tmp, "split")
+        os.makedirs(single_dir)
+        os.makedirs(split_dir)
+        (big_file,) = write_pages(single_dir, args.cards, 1)
+        random.seed(42)
+        write_pages(split_dir, args.cards, args.files)
+        results["file_mb"] = round(os.path.getsize(big_file) / 1e6, 1)
+
+        reference = None
+        for mode in modes:
+            reviews, seconds = timed(lambda: review_sources.scrape_html_file(big_file, mode))
+            if reference is None:
+                reference = reviews
+            elif reviews != reference:
+                print(f"❌ Mode '{mode}' returned different records than '{modes[0]}'.", file=sys.stderr)
+                sys.exit(1)
+            results["single_file"].append({"mode": mode, "seconds": round(seconds, 3), "reviews": len(reviews), "cards_per_second": round(args.cards / seconds)})
+
+        fastest = review_sources.HTML_SCRAPER_MODE
+        for workers in sorted({1, os.cpu_count() or 1}):
+            reviews, seconds = timed(lambda: list(review_sources.scrape_html_directory(split_dir, workers=workers, mode=fastest)))
+            if reference is not None and reviews != reference:
+                print(f"❌ Directory scrape with {workers} workers returned different records.", file=sys.stderr)
+                sys.exit(1)
+            results["directory"].append({"mode": fastest, "files": args.files, "workers": workers, "seconds": round(seconds, 3), "cards_per_second": round(args.cards / seconds)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.cards} cards, {results['file_mb']} MB in one file")
+    for row in results["single_file"]:
+        print(f"  {row['mode']:<8}{row['seconds']:>9.2f} s{row['cards_per_second']:>12} cards/s")
+    print(f"Same cards split over {args.files} files:")
+    for row in results["directory"]:
+        print(f"  {row['mode']:<8}{row['workers']:>3} workers{row['seconds']:>9.2f} s{row['cards_per_second']:>12} cards/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cold-start cost of the web process: import time, heavy modules loaded, and first-request latency.
+
+Every measurement runs in a fresh interpreter so nothing is already imported. The
+import breakdown comes from `python -X importtime`. A summary request used to import
+ai_processor (pandas, bs4, google.generativeai) on the request path, so those modules
+must not be loaded by the web process at all.
+
+    python benchmarks/bench_startup.py [--runs 5] [--top 15] [--json]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only the offline pipeline needs; any of them in the web process is a regression.
+HEAVY_MODULES = ("pandas", "bs4", "google.generativeai", "grpc")
+
+# Imports app, then serves one request that needs no database. Prints timings in ms as JSON.
+FIRST_REQUEST_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/api/summary/jobs/00000000-0000-0000-0000-000000000000', headers={'Accept-Encoding': 'gzip'})
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_request_ms': (served - imported) * 1000,
+    'heavy_modules': [name for name in %r if name in sys.modules],
+}))
+"""
+
+# What the first summary job in a worker pays to build its first model (with the 'gemini' backend, the SDK import).
+GEMINI_INIT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import summarizer
+imported = time.perf_counter()
+from gemini_client import REVIEW_ANALYSIS_SCHEMA, build_json_model
+build_json_model(REVIEW_ANALYSIS_SCHEMA)
+print(json.dumps({'summarizer_import_ms': (imported - start) * 1000, 'gemini_init_ms': (time.perf_counter() - imported) * 1000}))
+"""
+
+
+def run_python(args):
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+
+
+def import_breakdown(top):
+    """Parses `-X importtime` output for `import app` into the total and the slowest modules."""
+    stderr = run_python(["-X", "importtime", "-c", "import app"]).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]  # drop the separator space; the remaining indent encodes nesting depth
+        modules.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000, "top_level": not name.startswith("  ")})
+
+    total_ms = sum(module["cumulative_ms"] for module in modules if module["top_level"])
+    slowest = sorted(modules, key=lambda module: module["self_ms"], reverse=True)[:top]
+    return total_ms, slowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    first_requests = [json.loads(run_python(["-c", FIRST_REQUEST_SCRIPT % (HEAVY_MODULES,)]).stdout.splitlines()[-1]) for _ in range(args.runs)]
+    gemini_inits = [json.loads(run_python(["-c", GEMINI_INIT_SCRIPT]).stdout.splitlines()[-1]) for _ in range(args.runs)]
+    total_ms, slowest = import_breakdown(args.top)
+
+    results = {
+        "import_app_ms": statistics.median(run["import_ms"] for run in first_requests),
+        "first_request_ms": statistics.median(run["first_request_ms"] for run in first_requests),
+        "heavy_modules_loaded": sorted({name for run in first_requests for name in run["heavy_modules"]}),
+        "summarizer_import_ms": statistics.median(run["summarizer_import_ms"] for run in gemini_inits),
+        "gemini_init_ms": statistics.median(run["gemini_init_ms"] for run in gemini_inits),
+        "importtime_total_ms": total_ms,
+        "slowest_imports": slowest,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"import app (median of {args.runs}):   {results['import_app_ms']:8.1f} ms")
+        print(f"first request:                {results['first_request_ms']:8.1f} ms")
+        print(f"summarizer import:            {results['summarizer_import_ms']:8.1f} ms")
+        print(f"Gemini SDK init (first job):  {results['gemini_init_ms']:8.1f} ms")
+        print(f"-X importtime total:          {total_ms:8.1f} ms")
+        print("\nSlowest modules by self time:")
+        for module in slowest:
+            print(f"  {module['self_ms']:7.1f} ms  {module['module']}")
+
+    if results["heavy_modules_loaded"]:
+        print(f"❌ The web process imported {', '.join(results['heavy_modules_loaded'])}.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
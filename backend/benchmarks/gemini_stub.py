@@ -0,0 +1,252 @@
+"""Local stand-in for the Gemini REST API, so the pipeline and summaries run offline and for free.
+
+Answers POST /v1beta/models/<model>:generateContent with JSON that matches the request's
+responseSchema. Review IDs in batch prompts ("[ID: 3]") are echoed back one item per
+review, and scores are derived from the prompt. Faults can be injected:
+
+- latency drawn from a fixed, uniform, exponential or lognormal distribution
+- a share of requests failing with 429 or 500, and a requests-per-minute quota that answers 429 when exceeded
+
+Every draw is seeded by the prompt, so a run with the same inputs and settings sees the
+same latencies and errors however its threads interleave. Token usage is counted like
+the real API (about 4 characters per token) and served, with request counts per status,
+at GET /stats (POST /stats/reset clears them).
+
+Point the backend at it with:
+
+    LLM_BACKEND=http GEMINI_API_ENDPOINT=http://127.0.0.1:8765
+
+    python benchmarks/gemini_stub.py [--port 8765] [--latency-ms 300] [--latency-dist lognormal]
+                                     [--error-429 0.05] [--error-500 0.01] [--rpm 0] [--seed 0]
+"""
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The SDK's REST transport sends schema types as enum numbers (enum-encoding=int); the 'http' backend sends names.
+SCHEMA_TYPE_NAMES = {1: "STRING", 2: "NUMBER", 3: "INTEGER", 4: "BOOLEAN", 5: "ARRAY", 6: "OBJECT"}
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+BATCH_ID_PATTERN = re.compile(r"\[ID: ([^\]]+)\]")
+SENTIMENTS = ("Positive", "Neutral", "Negative")
+STUB_TEXT = "Stand-in summary: solid academics, moderate cost, lively social scene and easy housing. \"Great campus.\""
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+class StandInStats:
+    """Thread-safe request and token counters of one stand-in server."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = {}
+            self.prompt_tokens = 0
+            self.output_tokens = 0
+            self.started_at = time.time()
+
+    def record(self, status, prompt_tokens=0, output_tokens=0):
+        with self.lock:
+            self.requests[str(status)] = self.requests.get(str(status), 0) + 1
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": self.prompt_tokens + self.output_tokens,
+                "seconds": round(time.time() - self.started_at, 3),
+            }
+
+
+class GeminiStandIn(ThreadingHTTPServer):
+    """HTTP server holding the fault-injection settings and statistics its handlers share."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=300, latency_dist="fixed", error_429=0.0, error_500=0.0, rpm=0, seed=0):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_dist must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        super().__init__(address, GeminiStandInHandler)
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.rpm = rpm
+        self.seed = seed
+        self.stats = StandInStats()
+        self.lock = threading.Lock()
+        self.prompt_attempts = {}
+        self.recent_requests = deque()
+
+    def rng_for(self, prompt):
+        """A random generator seeded by the prompt and how often it was seen, so retries draw afresh."""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self.lock:
+            attempt = self.prompt_attempts.get(digest, 0)
+            self.prompt_attempts[digest] = attempt + 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def draw_latency(self, rng):
+        mean = self.latency_ms / 1000
+        if self.latency_dist == "uniform":
+            return rng.uniform(0, 2 * mean)
+        if self.latency_dist == "exponential":
+            return rng.expovariate(1 / mean) if mean > 0 else 0.0
+        if self.latency_dist == "lognormal":
+            # sigma 0.5 gives a realistic long tail; mu is chosen so the mean stays latency_ms.
+            sigma = 0.5
+            return rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if mean > 0 else 0.0
+        return mean
+
+    def over_quota(self):
+        """Counts the request against the RPM quota; True if it exceeds it."""
+        if not self.rpm:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            while self.recent_requests and self.recent_requests[0] <= now - 60:
+                self.recent_requests.popleft()
+            if len(self.recent_requests) >= self.rpm:
+                return True
+            self.recent_requests.append(now)
+            return False
+
+
+def sample_for_schema(schema, rng, name="", batch_ids=None):
+    """Builds a value that satisfies a REST-encoded Gemini response schema.
+
+    Arrays of objects with a review_id get one item per ID found in the prompt.
+    """
+    schema_type = schema.get("type", "STRING")
+    schema_type = SCHEMA_TYPE_NAMES.get(schema_type, str(schema_type).upper())
+    if schema_type == "OBJECT":
+        return {child_name: sample_for_schema(child, rng, child_name) for child_name, child in schema.get("properties", {}).items()}
+    if schema_type == "ARRAY":
+        items = schema.get("items", {})
+        if batch_ids and "review_id" in items.get("properties", {}):
+            return [dict(sample_for_schema(items, rng), review_id=review_id) for review_id in batch_ids]
+        return [sample_for_schema(items, rng, name)]
+    if schema_type == "INTEGER":
+        return rng.randint(1, 5) if name.endswith("_score") else rng.randint(0, 100)
+    if schema_type == "NUMBER":
+        return round(rng.uniform(1, 5), 2)
+    if schema_type == "BOOLEAN":
+        return rng.random() < 0.5
+    if "sentiment" in name:
+        return rng.choice(SENTIMENTS)
+    return STUB_TEXT
+
+
+class GeminiStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.server.stats.snapshot())
+        else:
+            self.send_json(404, {"error": {"code": 404, "message": f"Unknown path {self.path}", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path == "/stats/reset":
+            self.server.stats.reset()
+            self.send_json(200, {})
+            return
+        if not self.path.split("?")[0].endswith(":generateContent"):
+            self.send_json(404, {"error": {"code": 404, "message": f"Unknown method {self.path}", "status": "NOT_FOUND"}})
+            return
+
+        server = self.server
+        prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+        rng = server.rng_for(prompt)
+        if server.over_quota():
+            self.send_error_status(429, "RESOURCE_EXHAUSTED", "Quota exceeded: requests per minute.")
+            return
+        time.sleep(server.draw_latency(rng))
+        roll = rng.random()
+        if roll < server.error_429:
+            self.send_error_status(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (injected).")
+            return
+        if roll < server.error_429 + server.error_500:
+            self.send_error_status(500, "INTERNAL", "An internal error has occurred (injected).")
+            return
+
+        schema = body.get("generationConfig", {}).get("responseSchema", {"type": "STRING"})
+        answer = json.dumps(sample_for_schema(schema, rng, batch_ids=BATCH_ID_PATTERN.findall(prompt)), ensure_ascii=False)
+        prompt_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(answer)
+        server.stats.record(200, prompt_tokens, output_tokens)
+        self.send_json(200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": answer}]}, "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            },
+        })
+
+    def send_error_status(self, code, status, message):
+        self.server.stats.record(code)
+        self.send_json(code, {"error": {"code": code, "message": message, "status": status}})
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, **settings):
+    """Starts a stand-in in a background thread and returns it; its port is server.server_port.
+
+    `settings` are GeminiStandIn's keyword arguments (latency_ms, latency_dist, error_429, error_500, rpm, seed).
+    """
+    server = GeminiStandIn(("127.0.0.1", port), **settings)
+    threading.Thread(target=server.serve_forever, name="gemini-stand-in", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300, help="mean delay before every answer")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--error-429", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--error-500", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before answering 429 (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = GeminiStandIn(
+        ("127.0.0.1", args.port), latency_ms=args.latency_ms, latency_dist=args.latency_dist,
+        error_429=args.error_429, error_500=args.error_500, rpm=args.rpm, seed=args.seed
+    )
+    print(f"Gemini stand-in listening on http://127.0.0.1:{args.port} ({args.latency_dist} latency, mean {args.latency_ms:.0f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Repeatable load test of the API against a seeded local PostgreSQL and a stubbed Gemini.
+
+Seeds the database from .env (use a scratch database, never production) with
+--universities × --reviews-per-uni synthetic reviews, starts the app under gunicorn with
+Gemini pointed at benchmarks/gemini_stub.py, then drives a fixed mix of routes at each
+concurrency level and reports p50/p95/p99 latency and throughput.
+
+    python benchmarks/load_test.py [--universities 200] [--reviews-per-uni 50] [--concurrency 1,8,32]
+                                   [--duration 15] [--output results.json] [--baseline previous.json]
+
+The load generator runs on the same machine as the server, so compare results from the
+same machine only.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import db_pool
+from migrate import apply_migrations
+from benchmarks.gemini_stub import start_stub_server
+
+# Every seeded university starts with this prefix, so a re-seed can remove the previous run's rows.
+SEED_UNI_PREFIX = "Load Test University "
+SEED_SOURCE_TYPE = "load_test_seed"
+
+# (route label, relative weight) of the request mix driven at every concurrency level.
+ROUTE_MIX = (
+    ("GET /api/unis", 15),
+    ("GET /api/unis?major", 5),
+    ("GET /api/university/<name>", 25),
+    ("GET /api/reviews/<name>", 25),
+    ("GET /api/majors", 10),
+    ("GET /api/summary/<name>", 10),
+    ("POST /api/submit_review", 10),
+)
+
+
+def seed_dataset(universities, reviews_per_uni, majors):
+    """Replaces the previous load-test rows with universities × reviews_per_uni synthetic reviews.
+
+    Even-numbered universities get a cached AI summary (summary cache hits); odd-numbered
+    ones have none, so their first /api/summary call starts a job against the Gemini stub.
+    """
+    conn = db_pool.open_dedicated_connection()
+    try:
+        apply_migrations(conn)
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM exchange_reviews WHERE uni_name LIKE %s;", (SEED_UNI_PREFIX + '%',))
+            cursor.execute("DELETE FROM summary_jobs WHERE uni_name LIKE %s;", (SEED_UNI_PREFIX + '%',))
+            # Review r of university u; the first review of each university is the AI-processed one.
+            cursor.execute("""
+                INSERT INTO exchange_reviews (
+                    uni_name, city, source_type, raw_language, overall_sentiment, academics_score, cost_score,
+                    social_score, accommodation_score, theme_summary, raw_review_text, reviewer_type, status, major
+                )
+                SELECT
+                    %(prefix)s || u, 'Load Test City ' || (u / 4), %(source_type)s, 'en', 'Neutral',
+                    1 + (u + r) %% 5, 1 + (u * 3 + r) %% 5, 1 + (u * 7 + r) %% 5, 1 + (u + r * 3) %% 5,
+                    CASE WHEN r = 0 AND u %% 2 = 0 THEN 'Seeded summary of academics, cost, social life and housing.' END,
+                    (ARRAY['The campus is modern and professors are helpful.',
+                           'Rent is high and finding a flat took weeks.',
+                           'Great nightlife, cheap food and friendly students.',
+                           'الجامعة هادئة جداً، السكن رخيص والناس ودودون.'])[1 + (u + r) %% 4] || ' #' || r,
+                    CASE WHEN r = 0 THEN 'ai_processed' ELSE 'user_submitted' END,
+                    CASE WHEN r > 0 AND r %% 10 = 0 THEN 'pending' ELSE 'approved' END,
+                    CASE WHEN r %% 3 = 0
+                        THEN ARRAY['Load Test Major ' || ((u + r) %% %(majors)s), 'Load Test Major ' || ((u + r + 1) %% %(majors)s)]
+                        ELSE ARRAY['Load Test Major ' || ((u + r) %% %(majors)s)]
+                    END
+                FROM generate_series(0, %(universities)s - 1) AS u, generate_series(0, %(reviews)s - 1) AS r;
+            """, {
+                'prefix': SEED_UNI_PREFIX, 'source_type': SEED_SOURCE_TYPE, 'majors': majors,
+                'universities': universities, 'reviews': reviews_per_uni
+            })
+        conn.commit()
+
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE exchange_reviews;")
+    finally:
+        conn.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, workers, threads, llm_backend, gemini_endpoint, cache_dir):
+    """Starts gunicorn serving app:app and waits until it answers; returns the process."""
+    env = dict(
+        os.environ,
+        LLM_BACKEND=llm_backend,
+        GEMINI_API_ENDPOINT=gemini_endpoint,
+        GEMINI_API_KEY=os.getenv("GEMINI_API_KEY") or "load-test",
+        # The stub has no quota; keep the client-side limiter out of the measurement.
+        GEMINI_RPM="100000",
+        GEMINI_TPM="1000000000",
+        # Never mix stub answers into the real analysis cache.
+        GEMINI_CACHE_PATH=os.path.join(cache_dir, "gemini_analysis.sqlite3"),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{port}",
+         "--workers", str(workers), "--threads", str(threads), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not become ready within 30s")
+
+
+class LoadClient:
+    """One simulated user: a keep-alive connection that replays the route mix."""
+
+    def __init__(self, port, universities, majors, rng):
+        self.port = port
+        self.universities = universities
+        self.majors = majors
+        self.rng = rng
+        self.connection = None
+        self.routes = [label for label, weight in ROUTE_MIX for _ in range(weight)]
+
+    def build_request(self, label):
+        """(method, path, body) for one request of the given route."""
+        uni = quote(SEED_UNI_PREFIX + str(self.rng.randrange(self.universities)))
+        if label == "GET /api/unis":
+            return "GET", "/api/unis", None
+        if label == "GET /api/unis?major":
+            return "GET", "/api/unis?major=" + quote("Load Test Major " + str(self.rng.randrange(self.majors))), None
+        if label == "GET /api/university/<name>":
+            return "GET", f"/api/university/{uni}", None
+        if label == "GET /api/reviews/<name>":
+            return "GET", f"/api/reviews/{uni}?limit=20", None
+        if label == "GET /api/majors":
+            return "GET", "/api/majors", None
+        if label == "GET /api/summary/<name>":
+            # Even-numbered universities have a cached summary; cold ones are measured separately.
+            warm_uni = quote(SEED_UNI_PREFIX + str(2 * self.rng.randrange((self.universities + 1) // 2)))
+            return "GET", f"/api/summary/{warm_uni}", None
+        review = {
+            "uni_name": SEED_UNI_PREFIX + str(self.rng.randrange(self.universities)),
+            "city": "Load Test City",
+            "raw_review_text": "Submitted during a load test. The library is open late and rent is fair.",
+            "academics_score": self.rng.randint(1, 5),
+            "cost_score": self.rng.randint(1, 5),
+            "social_score": self.rng.randint(1, 5),
+            "accommodation_score": self.rng.randint(1, 5),
+        }
+        return "POST", "/api/submit_review", json.dumps(review)
+
+    def send(self, method, path, body=None):
+        """Sends one request and reads the full response; returns (status, body bytes)."""
+        headers = {"Accept-Encoding": "gzip, br"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                # The server closed the keep-alive connection; reconnect once.
+                self.connection.close()
+                self.connection = None
+                if attempt == 1:
+                    raise
+
+    def run(self, stop_at, samples):
+        while time.monotonic() < stop_at:
+            label = self.rng.choice(self.routes)
+            method, path, body = self.build_request(label)
+            start = time.perf_counter()
+            try:
+                status, _ = self.send(method, path, body)
+            except (http.client.HTTPException, OSError):
+                status = 0
+            samples.append((label, time.perf_counter() - start, status))
+        if self.connection is not None:
+            self.connection.close()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def latency_summary(latencies):
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+
+def run_level(port, concurrency, duration, universities, majors, seed):
+    """Drives the route mix with `concurrency` clients for `duration` seconds."""
+    samples = []
+    stop_at = time.monotonic() + duration
+    clients = [LoadClient(port, universities, majors, random.Random(seed + index)) for index in range(concurrency)]
+    threads = [threading.Thread(target=client.run, args=(stop_at, samples)) for client in clients]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    routes = {}
+    for label, _ in ROUTE_MIX:
+        route_samples = [sample for sample in samples if sample[0] == label]
+        routes[label] = {
+            "requests": len(route_samples),
+            "errors": sum(1 for _, _, status in route_samples if status == 0 or status >= 500),
+            **latency_summary([latency for _, latency, _ in route_samples]),
+        }
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(samples),
+        "errors": sum(route["errors"] for route in routes.values()),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        **latency_summary([latency for _, latency, _ in samples]),
+        "routes": routes,
+    }
+
+
+def run_summary_jobs(port, universities, jobs, timeout=120):
+    """Time-to-summary for universities without a cached summary: GET /api/summary, then poll the job."""
+    cold_unis = [SEED_UNI_PREFIX + str(index) for index in range(1, universities, 2)][:jobs]
+    results = []
+
+    def generate(uni_name):
+        client = LoadClient(port, universities, 1, random.Random(0))
+        start = time.perf_counter()
+        status, body = client.send("GET", f"/api/summary/{quote(uni_name)}")
+        if status == 202:
+            status_url = json.loads(body)["status_url"]
+            while time.perf_counter() - start < timeout:
+                status, body = client.send("GET", status_url)
+                if status != 200 or json.loads(body)["status"] not in ("queued", "running"):
+                    break
+                time.sleep(0.05)
+        done = status == 200 and bool(json.loads(body).get("summary"))
+        results.append((time.perf_counter() - start, done))
+
+    threads = [threading.Thread(target=generate, args=(uni_name,)) for uni_name in cold_unis]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "jobs": len(results),
+        "failed": sum(1 for _, done in results if not done),
+        **latency_summary([seconds for seconds, done in results if done]),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results, baseline=None):
+    baseline_levels = {level["concurrency"]: level for level in (baseline or {}).get("levels", [])}
+    print(f"\n{'conc':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for level in results["levels"]:
+        line = f"{level['concurrency']:>5}{level['throughput_rps']:>9}{level['p50_ms']:>9}{level['p95_ms']:>9}{level['p99_ms']:>9}{level['errors']:>8}"
+        previous = baseline_levels.get(level["concurrency"])
+        if previous:
+            line += f"   vs baseline: {level['throughput_rps'] / previous['throughput_rps'] - 1:+.0%} req/s, p95 {level['p95_ms'] / previous['p95_ms'] - 1:+.0%}"
+        print(line)
+        for label, route in level["routes"].items():
+            print(f"      {label:<30}{route['requests']:>7} req  p50 {route['p50_ms']} ms  p95 {route['p95_ms']} ms  p99 {route['p99_ms']} ms")
+    summary = results["summary_jobs"]
+    if summary["jobs"]:
+        print(f"\nCold AI summaries: {summary['jobs']} jobs, {summary['failed']} failed, p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--universities", type=int, default=200, help="synthetic universities to seed")
+    parser.add_argument("--reviews-per-uni", type=int, default=50, help="synthetic reviews per university")
+    parser.add_argument("--majors", type=int, default=12, help="distinct synthetic majors")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the rows seeded by a previous run")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per concurrency level")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--llm-backend", default="gemini", help="LLM_BACKEND of the server: 'gemini' (SDK, as deployed) or 'http'")
+    parser.add_argument("--gemini-latency-ms", type=float, default=300, help="delay of every stubbed Gemini answer")
+    parser.add_argument("--summary-jobs", type=int, default=10, help="cold AI summaries to time (0 to skip)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed of the request mix")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        print(f"🌱 Seeding {args.universities} × {args.reviews_per_uni} synthetic reviews...")
+        seed_dataset(args.universities, args.reviews_per_uni, args.majors)
+
+    stub = start_stub_server(latency_ms=args.gemini_latency_ms)
+    port = free_port()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        server = start_server(port, args.workers, args.threads, args.llm_backend, f"http://127.0.0.1:{stub.server_port}", cache_dir)
+        try:
+            levels = []
+            for concurrency in [int(value) for value in args.concurrency.split(",") if value]:
+                print(f"🚀 {concurrency} concurrent clients for {args.duration:.0f}s...")
+                levels.append(run_level(port, concurrency, args.duration, args.universities, args.majors, args.seed))
+            summary_jobs = run_summary_jobs(port, args.universities, args.summary_jobs) if args.summary_jobs else {"jobs": 0, "failed": 0}
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            stub.shutdown()
+
+    results = {
+        "meta": {
+            "git_commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "dataset": {"universities": args.universities, "reviews_per_uni": args.reviews_per_uni, "majors": args.majors},
+            "server": {"workers": args.workers, "threads": args.threads, "submit_write_behind": os.getenv("SUBMIT_WRITE_BEHIND", "0") == "1"},
+            "llm_backend": args.llm_backend,
+            "gemini_latency_ms": args.gemini_latency_ms,
+            "route_mix": dict(ROUTE_MIX),
+        },
+        "levels": levels,
+        "summary_jobs": summary_jobs,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import time
+import select
+import threading
+from collections import OrderedDict
+
+# 'postgres' evicts entries in every worker via LISTEN/NOTIFY; 'local' keeps invalidation per process.
+CACHE_INVALIDATION_BACKEND = os.getenv("CACHE_INVALIDATION_BACKEND", "postgres")
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire `ttl` seconds after being stored."""
+
+    def __init__(self, max_entries=512, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value for `key`, or None if it is missing or expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        """Removes `key` if present; returns True if something was evicted."""
+        with self.lock:
+            return self.entries.pop(key, None) is not None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+
+class NotificationListener:
+    """Background thread that dispatches PostgreSQL NOTIFY messages to per-channel handlers.
+
+    Notifications are sent by database triggers (see migrations/0004 and 0007), so every
+    worker hears about every committed change no matter which process or script made it.
+    Notifications sent while the listener is disconnected are lost, so each subscriber
+    also gets on_connect/on_disconnect hooks to resynchronize (e.g. clear a cache).
+    """
+
+    def __init__(self, connect):
+        self.connect = connect
+        self.handlers = {}
+        self.connect_hooks = []
+        self.disconnect_hooks = []
+        self.pid = None
+        self.thread = None
+
+    def subscribe(self, channel, handler, on_connect=None, on_disconnect=None):
+        """Calls handler(payload) for each notification on `channel`."""
+        self.handlers[channel] = handler
+        if on_connect is not None:
+            self.connect_hooks.append(on_connect)
+        if on_disconnect is not None:
+            self.disconnect_hooks.append(on_disconnect)
+
+    def ensure_running(self):
+        """Starts the listener thread in the current process if it is not running yet (safe after fork)."""
+        if self.thread is not None and self.thread.is_alive() and self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self._run, name="db-notification-listener", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        retry_delay = 1.0
+        while True:
+            conn = None
+            try:
+                conn = self.connect()
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    for channel in self.handlers:
+                        cursor.execute(f"LISTEN {channel};")
+                for hook in self.connect_hooks:
+                    hook()
+                retry_delay = 1.0
+
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        self.handlers[notification.channel](notification.payload)
+            except Exception as e:
+                for hook in self.disconnect_hooks:
+                    hook()
+                print(f"⚠️ Database notification listener lost its connection: {e}. Retrying in {retry_delay:.0f}s...")
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30.0)
+            finally:
+                if conn is not None and not conn.closed:
+                    conn.close()
@@ -0,0 +1,60 @@
+import os
+import gzip
+
+from flask import request
+
+# brotli is optional: without it only gzip is offered.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; compressing them costs more than it saves.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+# Moderate levels: responses are dynamic, so CPU per request matters more than the last few bytes.
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain"}
+
+
+def compress_body(body, encoding):
+    """Compresses `body` (bytes) with 'br' or 'gzip'."""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def choose_encoding(accept_encodings):
+    """Picks the best content coding the client accepts: brotli if available, else gzip, else None."""
+    if brotli is not None and accept_encodings["br"] > 0:
+        return "br"
+    if accept_encodings["gzip"] > 0:
+        return "gzip"
+    return None
+
+
+def init_compression(app):
+    """Registers an after_request hook that compresses large text/JSON responses."""
+
+    @app.after_request
+    def compress_response(response):
+        if response.direct_passthrough or response.status_code < 200 or response.status_code >= 300:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or "Content-Encoding" in response.headers:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_BYTES:
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(compress_body(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    return app
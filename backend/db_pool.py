@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool
+from dotenv import load_dotenv
+
+from metrics import observe_query, timed_stage
+
+# --- Load Environment Variables from .env file ---
+load_dotenv()
+
+# Configure Database Connection Details from .env
+DB_HOST = os.getenv("DB_HOST")
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+
+# Pool sizing is per process: every gunicorn worker gets its own pool.
+DB_POOL_MIN_CONN = int(os.getenv("DB_POOL_MIN_CONN", "1"))
+DB_POOL_MAX_CONN = int(os.getenv("DB_POOL_MAX_CONN", "10"))
+# Seconds to wait for a free connection before giving up.
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+# Connections idle for longer than this are pinged before being handed out (0 = always ping).
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))
+
+
+class TimingCursor(extensions.cursor):
+    """Cursor that reports the duration of every statement to metrics (and the slow-query log)."""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            observe_query(query, time.perf_counter() - start)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            observe_query(query, time.perf_counter() - start)
+
+
+# Cursor class for every pooled connection. Must be set before the pool is created;
+# plan_check.py swaps in one that records the SQL each route runs.
+cursor_factory = TimingCursor
+
+_pool = None
+_pool_pid = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+_last_used = {}
+
+
+def get_pool():
+    """Returns the process-wide connection pool, creating it on first use.
+
+    The pool is created lazily and re-created after a fork, so gunicorn workers
+    never share sockets inherited from the master process.
+    """
+    global _pool, _pool_pid, _pool_slots
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = pool.ThreadedConnectionPool(
+                DB_POOL_MIN_CONN,
+                DB_POOL_MAX_CONN,
+                host=DB_HOST,
+                database=DB_NAME,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                cursor_factory=cursor_factory
+            )
+            _pool_pid = os.getpid()
+            _pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_CONN)
+            _last_used.clear()
+            print(f"Database connection pool created (min={DB_POOL_MIN_CONN}, max={DB_POOL_MAX_CONN}, pid={_pool_pid}).")
+    return _pool
+
+
+def _is_healthy(conn):
+    """Checks that a pooled connection is still usable before handing it out."""
+    if conn.closed:
+        return False
+    if conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+
+    idle_for = time.monotonic() - _last_used.get(id(conn), 0)
+    if idle_for < DB_POOL_PING_INTERVAL:
+        return True
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1;")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout(db_pool):
+    """Takes a healthy connection from the pool, replacing dead ones transparently."""
+    # One retry per pool slot: if every connection we get is dead, the server is likely down.
+    for _ in range(DB_POOL_MAX_CONN + 1):
+        conn = db_pool.getconn()
+        if _is_healthy(conn):
+            return conn
+        print("⚠️ Discarding broken pooled database connection.")
+        _last_used.pop(id(conn), None)
+        db_pool.putconn(conn, close=True)
+    raise psycopg2.OperationalError("No healthy database connection available.")
+
+
+@contextmanager
+def pooled_connection():
+    """Checks a connection out of the pool for the duration of a with-block.
+
+    Yields None if no connection could be obtained, mirroring the old
+    get_db_connection() contract so callers can return a 500. Any transaction
+    left open by the caller is rolled back when the connection is returned.
+    """
+    conn = None
+    db_pool = None
+    acquired = False
+    try:
+        # Waiting for a free slot counts as checkout time: it is what pool exhaustion costs a request.
+        with timed_stage('db_checkout'):
+            db_pool = get_pool()
+            acquired = _pool_slots.acquire(timeout=DB_POOL_TIMEOUT)
+            if not acquired:
+                print(f"Error connecting to the database: no free pooled connection after {DB_POOL_TIMEOUT}s")
+            else:
+                conn = _checkout(db_pool)
+    except Exception as e:
+        print(f"Error connecting to the database: {e}")
+        conn = None
+
+    try:
+        yield conn
+    finally:
+        if conn is not None:
+            _last_used[id(conn)] = time.monotonic()
+            db_pool.putconn(conn, close=bool(conn.closed))
+        if acquired:
+            _pool_slots.release()
+
+
+def open_dedicated_connection():
+    """Opens a connection outside the pool, for long-lived uses such as LISTEN."""
+    return psycopg2.connect(
+        host=DB_HOST,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD
+    )
+
+
+def close_pool():
+    """Closes every pooled connection of the current process (e.g. on shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+        _last_used.clear()
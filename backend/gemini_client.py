@@ -0,0 +1,254 @@
+import os
+import json
+import threading
+from dotenv import load_dotenv
+from rate_limiter import RateLimiter, backoff_delay
+from analysis_cache import AnalysisCache, analysis_cache_key
+from metrics import timed_stage
+from llm_backends import create_backend
+
+# Nothing heavy is imported here: google.generativeai (and the gRPC stack behind it) is only
+# loaded by the 'gemini' backend, the first time a model is actually built. The web process
+# imports this module through summary jobs, so worker boot never pays for the Gemini SDK.
+
+# Load environment variables (including GEMINI_API_KEY)
+load_dotenv()
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Optional base URL of a Gemini-compatible REST server (e.g. benchmarks/gemini_stub.py) used instead of Google's.
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+# Which client talks to the model (see llm_backends.py): 'gemini' uses the google.generativeai
+# SDK, 'http' a dependency-free REST client that starts instantly.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+# Gemini quotas for the configured key. The defaults match the free tier of gemini-2.5-flash.
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "10"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "250000"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+# Number of reviews packed into one Gemini request during bulk imports (1 disables batching).
+GEMINI_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "10"))
+# Rough allowance for the JSON answer, used until the API reports real usage.
+GEMINI_OUTPUT_TOKEN_ESTIMATE = 300
+
+# Persistent cache of analysis results, so unchanged reviews never cost another API call.
+GEMINI_CACHE_ENABLED = os.getenv("GEMINI_CACHE_ENABLED", "1") == "1"
+GEMINI_CACHE_PATH = os.getenv(
+    "GEMINI_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'gemini_analysis.sqlite3')
+)
+
+# One limiter per process, shared by every thread that talks to Gemini.
+gemini_rate_limiter = RateLimiter(GEMINI_RPM, GEMINI_TPM)
+
+_llm_backend = None
+_llm_backend_lock = threading.Lock()
+
+def get_llm_backend():
+    """Returns the process-wide LLM backend selected by LLM_BACKEND, creating it on first use."""
+    global _llm_backend
+    if _llm_backend is None:
+        with _llm_backend_lock:
+            if _llm_backend is None:
+                _llm_backend = create_backend(LLM_BACKEND, GEMINI_API_KEY, GEMINI_API_ENDPOINT)
+    return _llm_backend
+
+def estimate_tokens(text):
+    """Cheap token estimate (about 4 characters per token) used for TPM budgeting."""
+    return len(text) // 4 + 1
+
+def generate_with_backoff(model, prompt):
+    """Sends `prompt` to a model from build_json_model within the rate limits, backing off exponentially on 429/503.
+
+    Returns an llm_backends.LLMResponse.
+    """
+    backend = get_llm_backend()
+    estimated_tokens = estimate_tokens(prompt) + GEMINI_OUTPUT_TOKEN_ESTIMATE
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        gemini_rate_limiter.acquire(estimated_tokens)
+        try:
+            with timed_stage('gemini'):
+                response = backend.generate(model, prompt)
+        except backend.retryable_errors() as e:
+            if attempt == GEMINI_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"⏳ Gemini rate limited ({e.__class__.__name__}), backing off {delay:.1f}s (attempt {attempt + 1}/{GEMINI_MAX_RETRIES})...")
+            gemini_rate_limiter.pause(delay)
+            continue
+
+        gemini_rate_limiter.record_usage(estimated_tokens, response.total_tokens)
+        return response
+
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
+# Bump whenever the analysis prompt wording changes, so cached results from the old prompt are not reused.
+ANALYSIS_PROMPT_VERSION = 1
+
+# Structured Output Schema (Pydantic style for clarity).
+# This is critical for getting clean, reliable data into your DB.
+REVIEW_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "overall_sentiment": {"type": "string", "description": "Positive, Neutral, or Negative."},
+        "academics_score": {"type": "integer", "description": "Score from 1 (poor) to 5 (excellent)."},
+        "cost_score": {"type": "integer", "description": "Score from 1 (expensive) to 5 (cheap)."},
+        "social_score": {"type": "integer", "description": "Score from 1 (poor) to 5 (excellent)."},
+        "accommodation_score": {"type": "integer", "description": "Score from 1 (difficult) to 5 (easy/good)."},
+        "theme_summary": {"type": "string", "description": "A concise narrative summary (around 30-40 words) using simple language, covering academics, cost, social scene, and accommodation, including a short quote from the original review text."}
+    },
+    "required": ["overall_sentiment", "academics_score", "cost_score", "social_score", "accommodation_score", "theme_summary"]
+}
+
+# Batch variant: one array item per review, tagged with the ID it was given in the prompt.
+BATCH_REVIEW_ANALYSIS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "review_id": {"type": "string", "description": "The ID of the review exactly as given in the input."},
+            **REVIEW_ANALYSIS_SCHEMA["properties"]
+        },
+        "required": ["review_id"] + REVIEW_ANALYSIS_SCHEMA["required"]
+    }
+}
+
+SCORE_FIELDS = ("academics_score", "cost_score", "social_score", "accommodation_score")
+
+def build_json_model(response_schema):
+    """Creates a model, for generate_with_backoff, that answers with JSON matching `response_schema`."""
+    return get_llm_backend().json_model(GEMINI_MODEL_NAME, response_schema)
+
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+def get_analysis_cache():
+    """Returns the process-wide analysis cache, or None when caching is disabled.
+
+    Pipeline worker threads call this concurrently, so the cache is opened under a lock exactly once.
+    """
+    global _analysis_cache
+    if GEMINI_CACHE_ENABLED and _analysis_cache is None:
+        with _analysis_cache_lock:
+            if _analysis_cache is None:
+                _analysis_cache = AnalysisCache(GEMINI_CACHE_PATH)
+    return _analysis_cache
+
+def review_cache_key(review_text, uni_name):
+    """Cache key covering everything that determines the analysis of one review."""
+    return analysis_cache_key(review_text, uni_name, ANALYSIS_PROMPT_VERSION, GEMINI_MODEL_NAME, REVIEW_ANALYSIS_SCHEMA)
+
+def is_valid_analysis(result):
+    """Checks that an analysis dict has every field with a usable value."""
+    if not isinstance(result, dict):
+        return False
+    for field in SCORE_FIELDS:
+        score = result.get(field)
+        if isinstance(score, bool) or not isinstance(score, int) or not 1 <= score <= 5:
+            return False
+    return bool(isinstance(result.get("overall_sentiment"), str) and isinstance(result.get("theme_summary"), str) and result["theme_summary"].strip())
+
+def analyze_review_with_gemini(review_text, uni_name):
+    """Sends the review to Gemini for ABSA and structured JSON return."""
+    cache = get_analysis_cache()
+    cache_key = review_cache_key(review_text, uni_name)
+    if cache is not None:
+        cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+    # Craft the Multilingual Prompt (The Magic)
+    prompt = f"""
+    You are an expert student advisor analyzing feedback for {uni_name}. 
+    Your goal is to synthesize a very concise, easy-to-understand narrative review (approximately 30-40 words) for the university "{uni_name}". 
+    
+    The review must briefly cover Academics, Cost of Living, Social Scene, and Accommodation, using simple, direct language.
+    
+    Include one very short, direct quote from the provided student feedback to support a key point. Ensure the summary is structured as a single narrative paragraph.
+    
+    Synthesize the report from the following raw student feedback (which may contain both English and Arabic):
+    
+    Review Text: "{review_text}"
+    """
+    
+    try:
+        model = build_json_model(REVIEW_ANALYSIS_SCHEMA)
+        response = generate_with_backoff(model, prompt)
+        # The response text will be a clean JSON string, which we parse.
+        result = json.loads(response.text)
+        if cache is not None and is_valid_analysis(result):
+            cache.put(cache_key, result)
+        return result
+        
+    except Exception as e:
+        print(f"❌ Gemini API call failed for {uni_name}: {e}")
+        return None
+
+def analyze_reviews_batch_with_gemini(reviews):
+    """Analyzes several reviews with a single Gemini call.
+
+    `reviews` is a list of (review_id, review_text, uni_name) tuples with unique string IDs.
+    Returns a dict mapping each review_id to its analysis, or to None if it failed.
+    Reviews whose batch output is missing or malformed are retried one at a time.
+    Previously analyzed reviews are answered from the cache without calling Gemini.
+    """
+    results = {}
+    cache = get_analysis_cache()
+    cache_keys = {review_id: review_cache_key(review_text, uni_name) for review_id, review_text, uni_name in reviews}
+    if cache is not None:
+        cached_results = cache.get_many(cache_keys.values())
+        for review_id, cache_key in cache_keys.items():
+            if cache_key in cached_results:
+                results[review_id] = cached_results[cache_key]
+        reviews = [review for review in reviews if review[0] not in results]
+
+    if not reviews:
+        return results
+    if len(reviews) == 1:
+        review_id, review_text, uni_name = reviews[0]
+        results[review_id] = analyze_review_with_gemini(review_text, uni_name)
+        return results
+
+    review_blocks = "\n\n".join(
+        f"[ID: {review_id}] University: {uni_name}\nReview Text: {json.dumps(review_text, ensure_ascii=False)}"
+        for review_id, review_text, uni_name in reviews
+    )
+    prompt = f"""
+    You are an expert student advisor analyzing student feedback about exchange universities.
+    Analyze EACH of the {len(reviews)} reviews below independently and return one JSON array item per review, with its "review_id" copied exactly.
+
+    For each review, write a very concise, easy-to-understand narrative review (approximately 30-40 words) for its university.
+    It must briefly cover Academics, Cost of Living, Social Scene, and Accommodation, using simple, direct language,
+    and include one very short, direct quote from that review's text. Never mix content between reviews.
+
+    The raw student feedback may contain both English and Arabic:
+
+    {review_blocks}
+    """
+
+    try:
+        model = build_json_model(BATCH_REVIEW_ANALYSIS_SCHEMA)
+        response = generate_with_backoff(model, prompt)
+        items = json.loads(response.text)
+        if not isinstance(items, list):
+            items = []
+    except Exception as e:
+        print(f"❌ Gemini batch call failed for {len(reviews)} reviews: {e}")
+        items = []
+
+    # Demultiplex by ID; the model may reorder, drop or duplicate items.
+    expected_ids = {review_id for review_id, _, _ in reviews}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        review_id = str(item.pop("review_id", ""))
+        if review_id in expected_ids and review_id not in results and is_valid_analysis(item):
+            results[review_id] = item
+            if cache is not None:
+                cache.put(cache_keys[review_id], item)
+
+    # Fall back to single-review calls for anything the batch did not cover.
+    for review_id, review_text, uni_name in reviews:
+        if review_id not in results:
+            print(f"⚠️ Batch result missing or malformed for review {review_id} ({uni_name}). Retrying individually...")
+            results[review_id] = analyze_review_with_gemini(review_text, uni_name)
+
+    return results
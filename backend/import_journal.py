@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from analysis_cache import analysis_cache_key
+
+# Where ai_processor.py checkpoints an import run that has not finished yet.
+IMPORT_JOURNAL_PATH = os.getenv(
+    "IMPORT_JOURNAL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'import_journal.sqlite3')
+)
+
+
+def import_row_key(row):
+    """Identifies one input review across runs by its content, not its position in the files."""
+    return analysis_cache_key("import_row", row.get('source_type', 'csv_survey'), row['uni_name'], row.get('city'), row['raw_review_text'])
+
+
+class ImportJournal:
+    """Checkpoint journal of an import run, backed by a local SQLite file.
+
+    Each input review goes through two states:
+    - 'analyzed': its Gemini analysis is stored here as soon as the API returns it.
+    - 'committed': its record has been written to PostgreSQL.
+    A run restarted after a crash or quota wall skips committed reviews and reuses stored
+    analyses instead of paying for them again. Once a run finishes, the journal is cleared,
+    so the next import starts from scratch.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS import_journal ("
+            " row_key TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " analysis TEXT,"
+            " updated_at REAL NOT NULL"
+            ");"
+        )
+        self.conn.commit()
+
+    def counts(self):
+        """Returns {status: number of reviews} for the unfinished run, empty if there is none."""
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, count(*) FROM import_journal GROUP BY status;").fetchall())
+
+    def committed_keys(self, keys):
+        """Returns the subset of `keys` whose records are already in the database."""
+        return {key for key, status, _ in self._lookup(keys) if status == 'committed'}
+
+    def get_analyses(self, keys):
+        """Returns a dict of the stored analyses for whichever of `keys` have one."""
+        return {key: json.loads(analysis) for key, _, analysis in self._lookup(keys) if analysis is not None}
+
+    def _lookup(self, keys):
+        keys = list(keys)
+        rows = []
+        with self.lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                rows.extend(self.conn.execute(
+                    f"SELECT row_key, status, analysis FROM import_journal WHERE row_key IN ({placeholders});",
+                    chunk
+                ).fetchall())
+        return rows
+
+    def record_analyses(self, analyses):
+        """Checkpoints {row_key: analysis} pairs right after Gemini returned them."""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO import_journal (row_key, status, analysis, updated_at) VALUES (?, 'analyzed', ?, ?)"
+                " ON CONFLICT (row_key) DO UPDATE SET analysis = excluded.analysis, updated_at = excluded.updated_at;",
+                [(key, json.dumps(analysis, ensure_ascii=False), now) for key, analysis in analyses.items()]
+            )
+            self.conn.commit()
+
+    def mark_committed(self, keys):
+        """Marks reviews as written to the database; their analyses are no longer needed."""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO import_journal (row_key, status, analysis, updated_at) VALUES (?, 'committed', NULL, ?)"
+                " ON CONFLICT (row_key) DO UPDATE SET status = 'committed', analysis = NULL, updated_at = excluded.updated_at;",
+                [(key, now) for key in keys]
+            )
+            self.conn.commit()
+
+    def clear(self):
+        """Forgets the run, e.g. after it finished or to deliberately start over."""
+        with self.lock:
+            self.conn.execute("DELETE FROM import_journal;")
+            self.conn.commit()
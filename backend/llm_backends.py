@@ -0,0 +1,146 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from collections import namedtuple
+
+# What every backend returns from generate(): the answer text and the tokens it cost (0 if unknown).
+LLMResponse = namedtuple('LLMResponse', ['text', 'total_tokens'])
+
+# Google's public REST endpoint, used by the 'http' backend when no other endpoint is configured.
+GEMINI_PUBLIC_ENDPOINT = "https://generativelanguage.googleapis.com"
+
+
+class RetryableLLMError(Exception):
+    """The backend asked us to slow down (HTTP 429) or is temporarily unavailable (HTTP 503)."""
+
+
+class LLMError(Exception):
+    """The backend rejected or failed the request; retrying the same request will not help."""
+
+
+class GeminiSDKBackend:
+    """Talks to Gemini through the google.generativeai SDK (gRPC, or REST when an endpoint is set).
+
+    The SDK and the gRPC stack behind it are imported the first time a model is built,
+    so processes that never call Gemini never pay for them.
+    """
+
+    name = 'gemini'
+
+    def __init__(self, api_key, endpoint=None):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self._genai = None
+        self._retryable_errors = None
+        self._lock = threading.Lock()
+
+    @property
+    def genai(self):
+        if self._genai is None:
+            with self._lock:
+                if self._genai is None:
+                    import google.generativeai as genai
+                    if self.endpoint:
+                        genai.configure(api_key=self.api_key, transport="rest", client_options={"api_endpoint": self.endpoint})
+                    else:
+                        genai.configure(api_key=self.api_key)
+                    self._genai = genai
+        return self._genai
+
+    def json_model(self, model_name, response_schema):
+        """A model that answers with JSON matching `response_schema`."""
+        genai = self.genai
+        return genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=genai.types.GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=response_schema
+            )
+        )
+
+    def generate(self, model, prompt):
+        response = model.generate_content(prompt)
+        usage = getattr(response, 'usage_metadata', None)
+        return LLMResponse(response.text, getattr(usage, 'total_token_count', 0) or 0)
+
+    def retryable_errors(self):
+        if self._retryable_errors is None:
+            from google.api_core import exceptions as google_exceptions
+            self._retryable_errors = (google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable)
+        return self._retryable_errors
+
+
+def rest_schema(schema):
+    """Converts a response schema to the REST encoding, where types are upper-case enum names."""
+    converted = {}
+    for key, value in schema.items():
+        if key == 'type':
+            converted[key] = value.upper()
+        elif key == 'properties':
+            converted[key] = {name: rest_schema(child) for name, child in value.items()}
+        elif key == 'items':
+            converted[key] = rest_schema(value)
+        else:
+            converted[key] = value
+    return converted
+
+
+class GeminiRESTBackend:
+    """Calls the Gemini generateContent REST method with the standard library only.
+
+    Works against Google's endpoint and against any compatible server, such as the local
+    stand-in in benchmarks/gemini_stub.py. Nothing beyond urllib is imported.
+    """
+
+    name = 'http'
+
+    def __init__(self, api_key, endpoint=None, timeout=60.0):
+        self.api_key = api_key
+        self.endpoint = (endpoint or GEMINI_PUBLIC_ENDPOINT).rstrip('/')
+        self.timeout = timeout
+
+    def json_model(self, model_name, response_schema):
+        return {
+            'model_name': model_name,
+            'generationConfig': {'responseMimeType': 'application/json', 'responseSchema': rest_schema(response_schema)},
+        }
+
+    def generate(self, model, prompt):
+        body = json.dumps({
+            'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+            'generationConfig': model['generationConfig'],
+        }).encode('utf-8')
+        request = urllib.request.Request(
+            f"{self.endpoint}/v1beta/models/{model['model_name']}:generateContent",
+            data=body,
+            headers={'Content-Type': 'application/json', 'x-goog-api-key': self.api_key or ''},
+            method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode('utf-8', 'replace')[:200]
+            if e.code in (429, 503):
+                raise RetryableLLMError(f"HTTP {e.code}: {detail}") from e
+            raise LLMError(f"HTTP {e.code}: {detail}") from e
+
+        candidates = payload.get('candidates') or []
+        if not candidates:
+            raise LLMError(f"No candidates in response: {json.dumps(payload)[:200]}")
+        text = ''.join(part.get('text', '') for part in candidates[0].get('content', {}).get('parts', []))
+        return LLMResponse(text, payload.get('usageMetadata', {}).get('totalTokenCount', 0))
+
+    def retryable_errors(self):
+        return (RetryableLLMError,)
+
+
+LLM_BACKENDS = {GeminiSDKBackend.name: GeminiSDKBackend, GeminiRESTBackend.name: GeminiRESTBackend}
+
+
+def create_backend(name, api_key, endpoint=None):
+    """Builds the backend registered under `name` ('gemini' or 'http')."""
+    if name not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}'; expected one of: {', '.join(LLM_BACKENDS)}")
+    return LLM_BACKENDS[name](api_key, endpoint)
@@ -0,0 +1,212 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+# Set to 0 to drop the /metrics route and the per-request timing hooks.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# SQL statements slower than this are logged with their route and duration.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+# Slow queries are logged here at WARNING, with endpoint, duration_ms and statement as record
+# attributes, so a handler can ship them as structured fields (or off the request thread).
+slow_query_log = logging.getLogger('exchange.slow_query')
+
+# Upper bounds (seconds) of the latency buckets: sub-millisecond cache hits up to slow Gemini calls.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Request stages timed inside a route; each becomes a Server-Timing entry and a `stage` label.
+STAGES = ('db_checkout', 'db_query', 'serialize', 'gemini')
+
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with one series per label combination."""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        """Records `value` for the series identified by the `labels` tuple."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # Per-bucket (not cumulative) counts plus the +Inf bucket, sum and count.
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in sorted(self.series.items())]
+        for labels, counts, total, count in snapshot:
+            label_text = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{label_text + ',' if label_text else ''}{le}}} {cumulative}")
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+class Counter:
+    """Thread-safe Prometheus-style counter with one value per label combination."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            snapshot = sorted(self.values.items())
+        for labels, value in snapshot:
+            lines.append(f"{self.name}{{{_format_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+class Gauge:
+    """Prometheus-style gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        try:
+            lines.append(f"{self.name} {self.read()}")
+        except Exception as e:
+            print(f"⚠️ Could not read gauge {self.name}: {e}")
+        return lines
+
+
+def _format_labels(names, values):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+request_duration = Histogram(
+    "exchange_request_duration_seconds", "Time from the start of a request to its response, per route.", ("method", "route")
+)
+requests_total = Counter("exchange_requests_total", "Requests served, per route and status code.", ("method", "route", "status"))
+stage_duration = Histogram(
+    "exchange_stage_duration_seconds",
+    "Time spent in one stage (db_checkout, db_query, serialize, gemini) per endpoint; 'background' outside requests.",
+    ("stage", "endpoint")
+)
+slow_queries_total = Counter("exchange_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS, per endpoint.", ("endpoint",))
+
+REGISTRY = [request_duration, requests_total, stage_duration, slow_queries_total]
+
+
+def register_gauge(name, help_text, read):
+    """Adds a gauge to /metrics; `read()` is called on every scrape and returns its current value."""
+    REGISTRY.append(Gauge(name, help_text, read))
+
+
+def current_endpoint():
+    """The Flask endpoint being served, or 'background' for summary jobs, listeners and scripts."""
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'background'
+
+
+def observe_stage(stage, seconds):
+    """Records time spent in `stage`, and adds it to the current request's Server-Timing totals."""
+    stage_duration.observe((stage, current_endpoint()), seconds)
+    if has_request_context():
+        timings = g.setdefault('stage_timings', {})
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed_stage(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def observe_query(statement, seconds):
+    """Records one SQL statement's duration and logs it if it exceeded SLOW_QUERY_MS."""
+    observe_stage('db_query', seconds)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        endpoint = current_endpoint()
+        slow_queries_total.inc((endpoint,))
+        if isinstance(statement, bytes):
+            statement = statement.decode('utf-8', 'replace')
+        # The statement template only: bound values can hold review text and are left out.
+        statement = ' '.join(str(statement).split())[:500]
+        duration_ms = round(seconds * 1000)
+        slow_query_log.warning(
+            "Slow query (%d ms, %s): %s", duration_ms, endpoint, statement,
+            extra={'endpoint': endpoint, 'duration_ms': duration_ms, 'statement': statement}
+        )
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """Times every request per route, adds a Server-Timing header and serves GET /metrics.
+
+    Metrics live in process memory, so with several gunicorn workers each scrape sees the
+    worker that answered it. Register this before other after_request hooks (such as
+    compression) so their time is included.
+    """
+    if not METRICS_ENABLED:
+        return app
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_timing(response):
+        start = g.pop('request_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        request_duration.observe((request.method, route), elapsed)
+        requests_total.inc((request.method, route, str(response.status_code)))
+
+        timings = g.get('stage_timings', {})
+        server_timing = [f"{stage};dur={timings[stage] * 1000:.1f}" for stage in STAGES if stage in timings]
+        server_timing.append(f"total;dur={elapsed * 1000:.1f}")
+        response.headers["Server-Timing"] = ", ".join(server_timing)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    return app
@@ -0,0 +1,68 @@
+import os
+import sys
+
+from db_pool import pooled_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Arbitrary constant so concurrent deploys never apply the same migration twice.
+MIGRATION_LOCK_ID = 7_318_442
+
+
+def list_migrations():
+    """Returns (version, path) pairs for every NNNN_name.sql file, in version order."""
+    migrations = []
+    for file_name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if file_name.endswith('.sql'):
+            version = file_name.split('_', 1)[0]
+            migrations.append((version, os.path.join(MIGRATIONS_DIR, file_name)))
+    return migrations
+
+
+def apply_migrations(conn):
+    """Applies pending migrations, each in its own transaction. Returns the versions applied."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(32) PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+        """)
+        conn.commit()
+
+        cursor.execute("SELECT version FROM schema_migrations;")
+        applied = {row[0] for row in cursor.fetchall()}
+
+        newly_applied = []
+        for version, path in list_migrations():
+            if version in applied:
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                sql = f.read()
+            try:
+                cursor.execute(sql)
+                cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s);", (version,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                print(f"❌ Migration {os.path.basename(path)} failed.")
+                raise
+            print(f"✅ Applied migration {os.path.basename(path)}")
+            newly_applied.append(version)
+        return newly_applied
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        cursor.close()
+
+
+if __name__ == '__main__':
+    with pooled_connection() as conn:
+        if conn is None:
+            print("❌ FATAL ERROR: Cannot run migrations. Database connection failed.")
+            sys.exit(1)
+        applied_versions = apply_migrations(conn)
+        if not applied_versions:
+            print("Database schema is already up to date.")
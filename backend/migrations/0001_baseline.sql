@@ -0,0 +1,24 @@
+-- Baseline schema for exchange_reviews, matching the README.
+-- Safe to run against databases that were created by hand before migrations existed.
+CREATE TABLE IF NOT EXISTS exchange_reviews (
+    id SERIAL PRIMARY KEY,
+    uni_name VARCHAR(255) NOT NULL,
+    city VARCHAR(255),
+    source_type VARCHAR(50),
+    raw_review_text TEXT,
+    raw_language VARCHAR(10),
+    overall_sentiment VARCHAR(50),
+    academics_score INTEGER,
+    cost_score INTEGER,
+    social_score INTEGER,
+    accommodation_score INTEGER,
+    theme_summary TEXT,
+    reviewer_type VARCHAR(50) DEFAULT 'ai_processed',
+    status VARCHAR(20) DEFAULT 'approved',
+    major TEXT[]
+);
+
+ALTER TABLE exchange_reviews ADD COLUMN IF NOT EXISTS overall_sentiment VARCHAR(50);
+ALTER TABLE exchange_reviews ADD COLUMN IF NOT EXISTS reviewer_type VARCHAR(50) DEFAULT 'ai_processed';
+ALTER TABLE exchange_reviews ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'approved';
+ALTER TABLE exchange_reviews ADD COLUMN IF NOT EXISTS major TEXT[];
@@ -0,0 +1,18 @@
+-- Natural key for AI-processed reviews so ai_processor.insert_records can upsert in bulk
+-- with INSERT ... ON CONFLICT instead of a SELECT per record.
+ALTER TABLE exchange_reviews
+    ADD COLUMN IF NOT EXISTS review_hash TEXT GENERATED ALWAYS AS (md5(COALESCE(raw_review_text, ''))) STORED;
+
+-- Older imports could only create duplicates through races; keep the oldest copy.
+DELETE FROM exchange_reviews newer
+USING exchange_reviews older
+WHERE newer.reviewer_type = 'ai_processed'
+  AND older.reviewer_type = 'ai_processed'
+  AND newer.uni_name = older.uni_name
+  AND newer.review_hash = older.review_hash
+  AND newer.id > older.id;
+
+-- User submissions are deliberately excluded: two students may write the same text.
+CREATE UNIQUE INDEX IF NOT EXISTS exchange_reviews_ai_review_key
+    ON exchange_reviews (uni_name, review_hash, reviewer_type)
+    WHERE reviewer_type = 'ai_processed';
@@ -0,0 +1,113 @@
+-- Per-university aggregates maintained incrementally by a trigger on exchange_reviews, so the
+-- map and details endpoints read one precomputed row per university instead of running AVG()
+-- over every approved review. Every write path (submit_review, update_review_status,
+-- ai_processor.insert_records, manual SQL) keeps it current because the trigger sits on the table.
+CREATE TABLE IF NOT EXISTS university_stats (
+    uni_name VARCHAR(255) PRIMARY KEY,
+    city VARCHAR(255),
+    review_count INTEGER NOT NULL DEFAULT 0,      -- approved reviews
+    scored_count INTEGER NOT NULL DEFAULT 0,      -- approved reviews that carry all four scores
+    sum_academics BIGINT NOT NULL DEFAULT 0,
+    sum_cost BIGINT NOT NULL DEFAULT 0,
+    sum_social BIGINT NOT NULL DEFAULT 0,
+    sum_accommodation BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Averages derived from the running sums. overall_score is the mean of the per-review
+-- averages, i.e. the same value as AVG((academics + cost + social + accommodation) / 4.0).
+CREATE OR REPLACE VIEW university_scores AS
+SELECT
+    uni_name,
+    city,
+    review_count,
+    ROUND(sum_academics::numeric / NULLIF(scored_count, 0), 2) AS avg_academics,
+    ROUND(sum_cost::numeric / NULLIF(scored_count, 0), 2) AS avg_cost,
+    ROUND(sum_social::numeric / NULLIF(scored_count, 0), 2) AS avg_social,
+    ROUND(sum_accommodation::numeric / NULLIF(scored_count, 0), 2) AS avg_accommodation,
+    (sum_academics + sum_cost + sum_social + sum_accommodation)::numeric / NULLIF(scored_count * 4, 0) AS overall_score
+FROM university_stats
+WHERE review_count > 0;
+
+-- Adds (sign = 1) or removes (sign = -1) one review's contribution.
+CREATE OR REPLACE FUNCTION university_stats_apply(r exchange_reviews, sign INTEGER) RETURNS void AS $$
+DECLARE
+    scored BOOLEAN := r.academics_score IS NOT NULL AND r.cost_score IS NOT NULL
+                  AND r.social_score IS NOT NULL AND r.accommodation_score IS NOT NULL;
+BEGIN
+    INSERT INTO university_stats AS s (
+        uni_name, city, review_count, scored_count,
+        sum_academics, sum_cost, sum_social, sum_accommodation
+    ) VALUES (
+        r.uni_name, r.city, sign,
+        CASE WHEN scored THEN sign ELSE 0 END,
+        CASE WHEN scored THEN sign * r.academics_score ELSE 0 END,
+        CASE WHEN scored THEN sign * r.cost_score ELSE 0 END,
+        CASE WHEN scored THEN sign * r.social_score ELSE 0 END,
+        CASE WHEN scored THEN sign * r.accommodation_score ELSE 0 END
+    )
+    ON CONFLICT (uni_name) DO UPDATE SET
+        review_count = s.review_count + EXCLUDED.review_count,
+        scored_count = s.scored_count + EXCLUDED.scored_count,
+        sum_academics = s.sum_academics + EXCLUDED.sum_academics,
+        sum_cost = s.sum_cost + EXCLUDED.sum_cost,
+        sum_social = s.sum_social + EXCLUDED.sum_social,
+        sum_accommodation = s.sum_accommodation + EXCLUDED.sum_accommodation,
+        -- User submissions default to 'Unknown'; prefer any real city we have seen.
+        city = CASE WHEN s.city IS NULL OR s.city = 'Unknown' THEN COALESCE(EXCLUDED.city, s.city) ELSE s.city END,
+        updated_at = now();
+
+    IF sign < 0 THEN
+        DELETE FROM university_stats WHERE uni_name = r.uni_name AND review_count <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION exchange_reviews_maintain_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'approved' THEN
+        PERFORM university_stats_apply(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'approved' THEN
+        PERFORM university_stats_apply(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Block writers while the trigger is installed and the table is backfilled.
+LOCK TABLE exchange_reviews IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS exchange_reviews_stats_insert_delete ON exchange_reviews;
+CREATE TRIGGER exchange_reviews_stats_insert_delete
+    AFTER INSERT OR DELETE ON exchange_reviews
+    FOR EACH ROW EXECUTE FUNCTION exchange_reviews_maintain_stats();
+
+-- Summary refreshes and other non-aggregate updates do not fire the trigger.
+DROP TRIGGER IF EXISTS exchange_reviews_stats_update ON exchange_reviews;
+CREATE TRIGGER exchange_reviews_stats_update
+    AFTER UPDATE OF uni_name, city, status, academics_score, cost_score, social_score, accommodation_score ON exchange_reviews
+    FOR EACH ROW EXECUTE FUNCTION exchange_reviews_maintain_stats();
+
+TRUNCATE university_stats;
+INSERT INTO university_stats (
+    uni_name, city, review_count, scored_count,
+    sum_academics, sum_cost, sum_social, sum_accommodation
+)
+SELECT
+    uni_name,
+    COALESCE(MIN(city) FILTER (WHERE city <> 'Unknown'), MIN(city)),
+    COUNT(*),
+    COUNT(*) FILTER (WHERE scored),
+    COALESCE(SUM(academics_score) FILTER (WHERE scored), 0),
+    COALESCE(SUM(cost_score) FILTER (WHERE scored), 0),
+    COALESCE(SUM(social_score) FILTER (WHERE scored), 0),
+    COALESCE(SUM(accommodation_score) FILTER (WHERE scored), 0)
+FROM (
+    SELECT *,
+        academics_score IS NOT NULL AND cost_score IS NOT NULL
+        AND social_score IS NOT NULL AND accommodation_score IS NOT NULL AS scored
+    FROM exchange_reviews
+    WHERE status = 'approved'
+) approved_reviews
+GROUP BY uni_name;
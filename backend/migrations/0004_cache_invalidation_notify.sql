@@ -0,0 +1,26 @@
+-- Broadcast the affected university on the 'university_cache' channel whenever an approved
+-- review changes, so every web worker evicts its cached copy (see cache.InvalidationListener).
+-- NOTIFY is delivered on commit and collapses duplicate payloads within a transaction,
+-- so a bulk import sends one message per university.
+CREATE OR REPLACE FUNCTION exchange_reviews_notify_cache() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'approved' THEN
+        PERFORM pg_notify('university_cache', OLD.uni_name);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'approved' THEN
+        PERFORM pg_notify('university_cache', NEW.uni_name);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS exchange_reviews_notify_cache_insert_delete ON exchange_reviews;
+CREATE TRIGGER exchange_reviews_notify_cache_insert_delete
+    AFTER INSERT OR DELETE ON exchange_reviews
+    FOR EACH ROW EXECUTE FUNCTION exchange_reviews_notify_cache();
+
+-- theme_summary is part of the cached details payload, so it counts here too.
+DROP TRIGGER IF EXISTS exchange_reviews_notify_cache_update ON exchange_reviews;
+CREATE TRIGGER exchange_reviews_notify_cache_update
+    AFTER UPDATE OF uni_name, city, status, academics_score, cost_score, social_score, accommodation_score, theme_summary ON exchange_reviews
+    FOR EACH ROW EXECUTE FUNCTION exchange_reviews_notify_cache();
@@ -0,0 +1,20 @@
+-- Background AI summary jobs. Rows live in the database rather than in worker memory so
+-- that any gunicorn worker can answer a status poll for a job started by another one.
+CREATE TABLE IF NOT EXISTS summary_jobs (
+    id UUID PRIMARY KEY,
+    uni_name VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- 'queued', 'running', 'done' or 'failed'
+    summary TEXT,
+    error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Single-flight: at most one unfinished job per university.
+CREATE UNIQUE INDEX IF NOT EXISTS summary_jobs_one_active_per_uni
+    ON summary_jobs (uni_name)
+    WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS summary_jobs_done_by_uni
+    ON summary_jobs (uni_name, updated_at DESC)
+    WHERE status = 'done';
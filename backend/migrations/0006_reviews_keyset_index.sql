@@ -0,0 +1,5 @@
+-- Serves GET /api/reviews/<uni_name> pages (newest first, keyset on id) straight from the
+-- index, so every page costs the same however many reviews a university has.
+CREATE INDEX IF NOT EXISTS exchange_reviews_approved_by_uni_id
+    ON exchange_reviews (uni_name, id DESC)
+    WHERE status = 'approved';
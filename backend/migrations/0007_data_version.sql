@@ -0,0 +1,54 @@
+-- Database-wide data version for HTTP ETags on the read endpoints. It is bumped once per
+-- statement that touches approved reviews and broadcast on the 'data_version' channel
+-- when the transaction commits. The bump is transactional, so a worker can never see a
+-- new version before the data it describes is visible.
+CREATE TABLE IF NOT EXISTS data_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),  -- single-row table
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+INSERT INTO data_version DEFAULT VALUES ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$
+DECLARE
+    touched_approved BOOLEAN;
+    new_version BIGINT;
+    new_updated_at TIMESTAMPTZ;
+BEGIN
+    -- Pending submissions do not change anything the public endpoints return.
+    IF TG_OP = 'INSERT' THEN
+        SELECT EXISTS (SELECT 1 FROM new_rows WHERE status = 'approved') INTO touched_approved;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT EXISTS (SELECT 1 FROM new_rows WHERE status = 'approved')
+            OR EXISTS (SELECT 1 FROM old_rows WHERE status = 'approved') INTO touched_approved;
+    ELSE
+        SELECT EXISTS (SELECT 1 FROM old_rows WHERE status = 'approved') INTO touched_approved;
+    END IF;
+
+    IF touched_approved THEN
+        UPDATE data_version SET version = version + 1, updated_at = now()
+        RETURNING version, updated_at INTO new_version, new_updated_at;
+        PERFORM pg_notify('data_version', new_version || ' ' || extract(epoch FROM new_updated_at));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables require one trigger per event.
+DROP TRIGGER IF EXISTS exchange_reviews_data_version_insert ON exchange_reviews;
+CREATE TRIGGER exchange_reviews_data_version_insert
+    AFTER INSERT ON exchange_reviews
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+DROP TRIGGER IF EXISTS exchange_reviews_data_version_update ON exchange_reviews;
+CREATE TRIGGER exchange_reviews_data_version_update
+    AFTER UPDATE ON exchange_reviews
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+DROP TRIGGER IF EXISTS exchange_reviews_data_version_delete ON exchange_reviews;
+CREATE TRIGGER exchange_reviews_data_version_delete
+    AFTER DELETE ON exchange_reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
@@ -0,0 +1,14 @@
+-- Full-text search over review text for GET /api/search. Reviews mix English and Arabic, so
+-- the vector holds the text analysed with both configurations, and the route parses the
+-- search terms with both as well. The column is generated, so every write path keeps it current.
+ALTER TABLE exchange_reviews
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('english'::regconfig, coalesce(raw_review_text, ''))
+        || to_tsvector('arabic'::regconfig, coalesce(raw_review_text, ''))
+    ) STORED;
+
+-- Only approved reviews are ever searched.
+CREATE INDEX IF NOT EXISTS exchange_reviews_search_vector
+    ON exchange_reviews USING gin (search_vector)
+    WHERE status = 'approved';
@@ -0,0 +1,6 @@
+-- Typo-tolerant university name matching for GET /api/search ("bremn" finds "University of Bremen").
+-- university_stats has one row per university, so names are matched there rather than across reviews.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS university_stats_uni_name_trgm
+    ON university_stats USING gin (uni_name gin_trgm_ops);
@@ -0,0 +1,27 @@
+-- Indexes for the remaining hot queries on exchange_reviews, each partial on exactly the rows its
+-- query reads. plan_check.py runs EXPLAIN on every route's SQL to make sure they stay in use.
+
+-- Cached AI summary lookup (get_ai_summary, get_university_details) and the review
+-- summary_jobs._store_summary writes the summary to.
+CREATE INDEX IF NOT EXISTS exchange_reviews_ai_approved_by_uni
+    ON exchange_reviews (uni_name, id)
+    WHERE reviewer_type = 'ai_processed' AND status = 'approved';
+
+-- Major filter of GET /api/unis (major @> ARRAY[...]).
+CREATE INDEX IF NOT EXISTS exchange_reviews_approved_major_gin
+    ON exchange_reviews USING gin (major)
+    WHERE status = 'approved';
+
+-- GET /api/majors walks the distinct major arrays with a skip scan over this index.
+CREATE INDEX IF NOT EXISTS exchange_reviews_approved_major_values
+    ON exchange_reviews (major)
+    WHERE status = 'approved' AND major IS NOT NULL AND major <> '{}';
+
+-- Admin moderation queue.
+CREATE INDEX IF NOT EXISTS exchange_reviews_pending_id
+    ON exchange_reviews (id)
+    WHERE status = 'pending';
+
+-- All review texts of one university, oldest first, for AI summary jobs.
+CREATE INDEX IF NOT EXISTS exchange_reviews_uni_name_id
+    ON exchange_reviews (uni_name, id);
@@ -0,0 +1,7 @@
+-- Client-visible ID of a user submission. The write-behind queue (submission_queue.py) can
+-- flush the same submission twice after a crash; the unique index turns the second INSERT
+-- into a no-op (ON CONFLICT DO NOTHING). Rows imported by ai_processor.py leave it NULL.
+ALTER TABLE exchange_reviews ADD COLUMN IF NOT EXISTS submission_id UUID;
+
+CREATE UNIQUE INDEX IF NOT EXISTS exchange_reviews_submission_id
+    ON exchange_reviews (submission_id);
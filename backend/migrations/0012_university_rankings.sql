@@ -0,0 +1,157 @@
+-- Precomputed rankings for GET /api/rankings. Both tables below are maintained row by row by
+-- triggers, carry their averages as stored generated columns, and have one index per score
+-- dimension in ranking order, so "best k universities for cost (within major X)" is an
+-- index scan of k + 1 rows however many universities exist.
+--
+-- The indexes are partial on scored_count >= 3, the smallest review threshold the endpoint
+-- accepts (RANKING_MIN_REVIEWS in app.py). Keep the two in sync: without the predicate a
+-- long tail of single-review 5.00 universities would be scanned and skipped on every request.
+
+-- --- 1. All majors: averages on university_stats (migrations/0003) ---
+ALTER TABLE university_stats
+    ADD COLUMN IF NOT EXISTS avg_academics NUMERIC GENERATED ALWAYS AS (ROUND(sum_academics::numeric / NULLIF(scored_count, 0), 2)) STORED,
+    ADD COLUMN IF NOT EXISTS avg_cost NUMERIC GENERATED ALWAYS AS (ROUND(sum_cost::numeric / NULLIF(scored_count, 0), 2)) STORED,
+    ADD COLUMN IF NOT EXISTS avg_social NUMERIC GENERATED ALWAYS AS (ROUND(sum_social::numeric / NULLIF(scored_count, 0), 2)) STORED,
+    ADD COLUMN IF NOT EXISTS avg_accommodation NUMERIC GENERATED ALWAYS AS (ROUND(sum_accommodation::numeric / NULLIF(scored_count, 0), 2)) STORED,
+    ADD COLUMN IF NOT EXISTS avg_overall NUMERIC GENERATED ALWAYS AS (
+        ROUND((sum_academics + sum_cost + sum_social + sum_accommodation)::numeric / NULLIF(scored_count * 4, 0), 2)
+    ) STORED;
+
+-- Ties on the (rounded) score are broken by the number of scored reviews, then by name.
+CREATE INDEX IF NOT EXISTS university_stats_rank_academics
+    ON university_stats (avg_academics DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+CREATE INDEX IF NOT EXISTS university_stats_rank_cost
+    ON university_stats (avg_cost DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+CREATE INDEX IF NOT EXISTS university_stats_rank_social
+    ON university_stats (avg_social DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+CREATE INDEX IF NOT EXISTS university_stats_rank_accommodation
+    ON university_stats (avg_accommodation DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+CREATE INDEX IF NOT EXISTS university_stats_rank_overall
+    ON university_stats (avg_overall DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+
+-- --- 2. Per major: the same aggregates for every (major, university) pair ---
+-- A review counts towards each distinct major in its major array; reviews without a major
+-- only count in university_stats.
+CREATE TABLE IF NOT EXISTS university_major_stats (
+    major TEXT NOT NULL,
+    uni_name VARCHAR(255) NOT NULL,
+    city VARCHAR(255),
+    review_count INTEGER NOT NULL DEFAULT 0,      -- approved reviews
+    scored_count INTEGER NOT NULL DEFAULT 0,      -- approved reviews that carry all four scores
+    sum_academics BIGINT NOT NULL DEFAULT 0,
+    sum_cost BIGINT NOT NULL DEFAULT 0,
+    sum_social BIGINT NOT NULL DEFAULT 0,
+    sum_accommodation BIGINT NOT NULL DEFAULT 0,
+    avg_academics NUMERIC GENERATED ALWAYS AS (ROUND(sum_academics::numeric / NULLIF(scored_count, 0), 2)) STORED,
+    avg_cost NUMERIC GENERATED ALWAYS AS (ROUND(sum_cost::numeric / NULLIF(scored_count, 0), 2)) STORED,
+    avg_social NUMERIC GENERATED ALWAYS AS (ROUND(sum_social::numeric / NULLIF(scored_count, 0), 2)) STORED,
+    avg_accommodation NUMERIC GENERATED ALWAYS AS (ROUND(sum_accommodation::numeric / NULLIF(scored_count, 0), 2)) STORED,
+    avg_overall NUMERIC GENERATED ALWAYS AS (
+        ROUND((sum_academics + sum_cost + sum_social + sum_accommodation)::numeric / NULLIF(scored_count * 4, 0), 2)
+    ) STORED,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (major, uni_name)
+);
+
+CREATE INDEX IF NOT EXISTS university_major_stats_rank_academics
+    ON university_major_stats (major, avg_academics DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+CREATE INDEX IF NOT EXISTS university_major_stats_rank_cost
+    ON university_major_stats (major, avg_cost DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+CREATE INDEX IF NOT EXISTS university_major_stats_rank_social
+    ON university_major_stats (major, avg_social DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+CREATE INDEX IF NOT EXISTS university_major_stats_rank_accommodation
+    ON university_major_stats (major, avg_accommodation DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+CREATE INDEX IF NOT EXISTS university_major_stats_rank_overall
+    ON university_major_stats (major, avg_overall DESC, scored_count DESC, uni_name) WHERE scored_count >= 3;
+
+-- Adds (sign = 1) or removes (sign = -1) one review's contribution to each of its majors.
+CREATE OR REPLACE FUNCTION university_major_stats_apply(r exchange_reviews, sign INTEGER) RETURNS void AS $$
+DECLARE
+    scored BOOLEAN := r.academics_score IS NOT NULL AND r.cost_score IS NOT NULL
+                  AND r.social_score IS NOT NULL AND r.accommodation_score IS NOT NULL;
+BEGIN
+    IF r.major IS NULL OR cardinality(r.major) = 0 THEN
+        RETURN;
+    END IF;
+
+    -- DISTINCT: a major listed twice in one review still counts that review once.
+    INSERT INTO university_major_stats AS s (
+        major, uni_name, city, review_count, scored_count,
+        sum_academics, sum_cost, sum_social, sum_accommodation
+    )
+    SELECT DISTINCT
+        m.major, r.uni_name, r.city, sign,
+        CASE WHEN scored THEN sign ELSE 0 END,
+        CASE WHEN scored THEN sign * r.academics_score ELSE 0 END,
+        CASE WHEN scored THEN sign * r.cost_score ELSE 0 END,
+        CASE WHEN scored THEN sign * r.social_score ELSE 0 END,
+        CASE WHEN scored THEN sign * r.accommodation_score ELSE 0 END
+    FROM unnest(r.major) AS m(major)
+    WHERE m.major IS NOT NULL AND m.major <> ''
+    ON CONFLICT (major, uni_name) DO UPDATE SET
+        review_count = s.review_count + EXCLUDED.review_count,
+        scored_count = s.scored_count + EXCLUDED.scored_count,
+        sum_academics = s.sum_academics + EXCLUDED.sum_academics,
+        sum_cost = s.sum_cost + EXCLUDED.sum_cost,
+        sum_social = s.sum_social + EXCLUDED.sum_social,
+        sum_accommodation = s.sum_accommodation + EXCLUDED.sum_accommodation,
+        city = CASE WHEN s.city IS NULL OR s.city = 'Unknown' THEN COALESCE(EXCLUDED.city, s.city) ELSE s.city END,
+        updated_at = now();
+
+    IF sign < 0 THEN
+        DELETE FROM university_major_stats
+        WHERE major = ANY (r.major) AND uni_name = r.uni_name AND review_count <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION exchange_reviews_maintain_major_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'approved' THEN
+        PERFORM university_major_stats_apply(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'approved' THEN
+        PERFORM university_major_stats_apply(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Block writers while the trigger is installed and the table is backfilled.
+LOCK TABLE exchange_reviews IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS exchange_reviews_major_stats_insert_delete ON exchange_reviews;
+CREATE TRIGGER exchange_reviews_major_stats_insert_delete
+    AFTER INSERT OR DELETE ON exchange_reviews
+    FOR EACH ROW EXECUTE FUNCTION exchange_reviews_maintain_major_stats();
+
+DROP TRIGGER IF EXISTS exchange_reviews_major_stats_update ON exchange_reviews;
+CREATE TRIGGER exchange_reviews_major_stats_update
+    AFTER UPDATE OF uni_name, city, status, major, academics_score, cost_score, social_score, accommodation_score ON exchange_reviews
+    FOR EACH ROW EXECUTE FUNCTION exchange_reviews_maintain_major_stats();
+
+TRUNCATE university_major_stats;
+INSERT INTO university_major_stats (
+    major, uni_name, city, review_count, scored_count,
+    sum_academics, sum_cost, sum_social, sum_accommodation
+)
+SELECT
+    major,
+    uni_name,
+    COALESCE(MIN(city) FILTER (WHERE city <> 'Unknown'), MIN(city)),
+    COUNT(*),
+    COUNT(*) FILTER (WHERE scored),
+    COALESCE(SUM(academics_score) FILTER (WHERE scored), 0),
+    COALESCE(SUM(cost_score) FILTER (WHERE scored), 0),
+    COALESCE(SUM(social_score) FILTER (WHERE scored), 0),
+    COALESCE(SUM(accommodation_score) FILTER (WHERE scored), 0)
+FROM (
+    SELECT DISTINCT ON (r.id, m.major)
+        m.major, r.uni_name, r.city, r.academics_score, r.cost_score, r.social_score, r.accommodation_score,
+        r.academics_score IS NOT NULL AND r.cost_score IS NOT NULL
+        AND r.social_score IS NOT NULL AND r.accommodation_score IS NOT NULL AS scored
+    FROM exchange_reviews r
+    CROSS JOIN LATERAL unnest(r.major) AS m(major)
+    WHERE r.status = 'approved' AND m.major IS NOT NULL AND m.major <> ''
+) approved_review_majors
+GROUP BY major, uni_name;
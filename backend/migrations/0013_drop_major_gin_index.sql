@@ -0,0 +1,4 @@
+-- GET /api/unis?major= now reads university_major_stats (migrations/0012) instead of aggregating
+-- reviews that match major @> ARRAY[...], so nothing uses this index any more; dropping it saves
+-- a GIN update on every review write. GET /api/majors keeps using exchange_reviews_approved_major_values.
+DROP INDEX IF EXISTS exchange_reviews_approved_major_gin;
@@ -0,0 +1,49 @@
+import json
+import base64
+import binascii
+
+
+class PaginationError(ValueError):
+    """Raised for malformed pagination query parameters; routes answer it with a 400."""
+
+
+def encode_cursor(values):
+    """Packs the keyset values of the last returned row into an opaque, URL-safe token."""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, expected_length):
+    """Unpacks a token made by encode_cursor, checking it holds `expected_length` values."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise PaginationError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != expected_length:
+        raise PaginationError("Invalid cursor.")
+    return values
+
+
+def parse_limit(raw_limit, default, maximum):
+    """Parses a ?limit= value, clamping it to 1..maximum."""
+    if raw_limit is None:
+        return default
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        raise PaginationError("limit must be an integer.")
+    return max(1, min(limit, maximum))
+
+
+def parse_fields(raw_fields, allowed_fields):
+    """Parses a ?fields=a,b projection, keeping the order of `allowed_fields`; no value means every field."""
+    if not raw_fields:
+        return list(allowed_fields)
+    requested = {field.strip() for field in raw_fields.split(",") if field.strip()}
+    if not requested:
+        raise PaginationError(f"fields must name at least one of: {', '.join(allowed_fields)}.")
+    unknown = requested - set(allowed_fields)
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed_fields)}.")
+    return [field for field in allowed_fields if field in requested]
@@ -0,0 +1,202 @@
+"""Query-plan regression check for the API routes.
+
+Calls every read route through Flask's test client, records each SQL statement it sends
+to PostgreSQL, and runs EXPLAIN on it. Fails (exit code 1) if any plan contains a
+sequential scan on a large table, which means a query lost its index.
+
+Run it against a local scratch database, never production:
+
+    python plan_check.py --seed 200000    # migrate, top the table up to 200k synthetic reviews, check
+    python plan_check.py                  # check the data that is already there
+"""
+import os
+import sys
+import argparse
+from urllib.parse import quote
+
+import db_pool
+from migrate import apply_migrations
+
+# Seeded rows are tagged so re-running --seed only adds what is missing.
+SEED_SOURCE_TYPE = 'plan_check_seed'
+# Spreads of the synthetic data; enough distinct values for realistic selectivity.
+SEED_UNIVERSITIES = 800
+SEED_MAJORS = 30
+
+
+class RecordingCursor(db_pool.TimingCursor):
+    """Cursor that remembers every statement it executed, with parameters bound."""
+
+    statements = []
+
+    def execute(self, query, vars=None):
+        result = super().execute(query, vars)
+        RecordingCursor.statements.append(self.query.decode('utf-8'))
+        return result
+
+
+def seed_reviews(conn, target_rows):
+    """Adds synthetic reviews until exchange_reviews holds at least `target_rows` rows."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT count(*) FROM exchange_reviews;")
+        missing = target_rows - cursor.fetchone()[0]
+        if missing > 0:
+            print(f"🌱 Seeding {missing} synthetic reviews (this fires the stats triggers and takes a while)...")
+            cursor.execute("SELECT coalesce(max(id), 0) FROM exchange_reviews;")
+            offset = cursor.fetchone()[0]
+            # 90% approved, 10% pending; one review in seven is AI-processed and carries a summary.
+            cursor.execute("""
+                INSERT INTO exchange_reviews (
+                    uni_name, city, source_type, raw_language, academics_score, cost_score, social_score,
+                    accommodation_score, theme_summary, raw_review_text, reviewer_type, status, major
+                )
+                SELECT
+                    'Seed University ' || (g %% %(unis)s),
+                    'Seed City ' || (g %% %(unis)s / 8),
+                    %(source_type)s, 'en',
+                    1 + g %% 5, 1 + (g / 5) %% 5, 1 + (g / 25) %% 5, 1 + (g / 125) %% 5,
+                    CASE WHEN g %% 7 = 0 THEN 'Seeded summary of academics, cost, social life and housing.' END,
+                    (ARRAY['The campus is modern and professors are helpful.',
+                           'Rent is high and finding a flat took weeks.',
+                           'Great nightlife, cheap food and friendly students.',
+                           'الجامعة هادئة جداً، السكن رخيص والناس ودودون.'])[1 + g %% 4] || ' #' || g,
+                    CASE WHEN g %% 7 = 0 THEN 'ai_processed' ELSE 'user_submitted' END,
+                    CASE WHEN g %% 10 = 0 THEN 'pending' ELSE 'approved' END,
+                    ARRAY['Seed Major ' || (g %% %(majors)s)]
+                FROM generate_series(%(start)s, %(stop)s) AS g;
+            """, {
+                'unis': SEED_UNIVERSITIES, 'majors': SEED_MAJORS, 'source_type': SEED_SOURCE_TYPE,
+                'start': offset + 1, 'stop': offset + missing
+            })
+        conn.commit()
+    finally:
+        cursor.close()
+
+    # Fresh statistics and visibility map, as autovacuum would eventually provide.
+    conn.autocommit = True
+    try:
+        with conn.cursor() as vacuum_cursor:
+            vacuum_cursor.execute("VACUUM ANALYZE exchange_reviews;")
+    finally:
+        conn.autocommit = False
+
+
+def large_tables(conn, min_rows):
+    """Names of the public tables the planner estimates at `min_rows` rows or more."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relkind = 'r' AND c.reltuples >= %s;
+        """, (min_rows,))
+        return {row[0] for row in cursor.fetchall()}
+
+
+def sample_values(conn):
+    """Picks the two busiest universities, a major, and a university whose AI summary is already cached."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT uni_name FROM university_stats ORDER BY review_count DESC LIMIT 2;")
+        uni_names = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT major[1] FROM exchange_reviews WHERE status = 'approved' AND major <> '{}' LIMIT 1;")
+        major = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT uni_name FROM exchange_reviews
+            WHERE reviewer_type = 'ai_processed' AND status = 'approved' AND theme_summary IS NOT NULL LIMIT 1;
+        """)
+        summary_row = cursor.fetchone()
+    return uni_names, major, summary_row[0] if summary_row else None
+
+
+def route_requests(uni_names, major, summary_uni_name):
+    """(label, path, headers) for every read route, with realistic parameters.
+
+    The AI summary route is only called for a university with a cached summary, since a
+    cache miss would start a real Gemini job.
+    """
+    admin_headers = {'X-API-Key': os.getenv("ADMIN_API_KEY", "")}
+    uni_name = uni_names[0]
+    return [
+        ("health check", "/", {}),
+        ("map, all universities", "/api/unis", {}),
+        ("map, filtered by major", f"/api/unis?major={major}", {}),
+        ("university details", f"/api/university/{uni_name}", {}),
+        ("comparison", "/api/compare?" + "&".join(f"unis={quote(name)}" for name in uni_names), {}),
+        ("rankings", "/api/rankings?dimension=cost&k=10", {}),
+        ("rankings within a major", f"/api/rankings?dimension=social&major={quote(major)}&k=10", {}),
+        ("reviews, first page", f"/api/reviews/{uni_name}?limit=20", {}),
+        ("reviews, full list", f"/api/reviews/{uni_name}", {}),
+        ("majors", "/api/majors", {}),
+        ("search", "/api/search?q=rent", {}),
+        ("search within a university", f"/api/search?q=rent&uni={uni_name}", {}),
+        ("admin pending queue", "/api/admin/reviews/pending", admin_headers),
+    ] + ([("AI summary", f"/api/summary/{summary_uni_name}", {})] if summary_uni_name else [])
+
+
+def scan_nodes(plan):
+    """Yields every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from scan_nodes(child)
+
+
+def explain(conn, statement):
+    with conn.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement.strip().rstrip(';'))
+        return cursor.fetchone()[0][0]['Plan']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if any route's SQL plans a sequential scan on a large table.")
+    parser.add_argument("--seed", type=int, metavar="ROWS", help="top exchange_reviews up to ROWS synthetic reviews first")
+    parser.add_argument("--min-rows", type=int, default=10000, help="tables with at least this many rows count as large")
+    args = parser.parse_args()
+
+    conn = db_pool.open_dedicated_connection()
+    try:
+        apply_migrations(conn)
+        if args.seed:
+            seed_reviews(conn, args.seed)
+        checked_tables = large_tables(conn, args.min_rows)
+        if not checked_tables:
+            print(f"⚠️ No table has {args.min_rows}+ rows, so every plan passes trivially. Use --seed to add data.")
+        uni_names, major, summary_uni_name = sample_values(conn)
+        if summary_uni_name is None:
+            print("⚠️ No cached AI summary found; skipping the AI summary route.")
+
+        # Record the SQL the routes send; the app's pool is created lazily, after this is set.
+        db_pool.cursor_factory = RecordingCursor
+        from app import app
+
+        client = app.test_client()
+        failures = []
+        for label, path, headers in route_requests(uni_names, major, summary_uni_name):
+            RecordingCursor.statements.clear()
+            response = client.get(path, headers=headers)
+            statements = [s for s in RecordingCursor.statements if s.lstrip().upper().startswith(("SELECT", "WITH"))]
+            print(f"\n{label}: GET {path} -> {response.status_code}, {len(statements)} queries")
+            if response.status_code >= 400:
+                failures.append(f"{label}: GET {path} returned {response.status_code}")
+
+            for statement in statements:
+                for node in scan_nodes(explain(conn, statement)):
+                    relation = node.get('Relation Name')
+                    if relation is None and 'Index Name' not in node:
+                        continue
+                    on_relation = f" on {relation}" if relation else ""
+                    using_index = f" using {node['Index Name']}" if 'Index Name' in node else ""
+                    print(f"    {node['Node Type']}{on_relation}{using_index}")
+                    if node['Node Type'] == 'Seq Scan' and relation in checked_tables:
+                        failures.append(f"{label}: sequential scan on {relation} in:\n{statement.strip()}")
+    finally:
+        conn.close()
+
+    if failures:
+        print(f"\n❌ {len(failures)} plan regression(s):")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print(f"\n✅ No sequential scans on large tables ({', '.join(sorted(checked_tables)) or 'none'}).")
+
+
+if __name__ == '__main__':
+    main()
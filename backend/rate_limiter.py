@@ -0,0 +1,80 @@
+import time
+import random
+import threading
+
+
+class TokenBucket:
+    """Thread-safe token bucket that refills continuously up to `capacity` per minute.
+
+    Callers reserve capacity up front and are told how long to wait; the bucket may go
+    into debt, which keeps reservations first-come-first-served under contention.
+    """
+
+    def __init__(self, capacity_per_minute):
+        self.capacity = float(capacity_per_minute)
+        self.fill_rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Reserves `amount` tokens and returns the number of seconds to wait before using them."""
+        amount = min(float(amount), self.capacity) # A single request can never need more than a full bucket.
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.fill_rate
+
+    def adjust(self, delta):
+        """Returns (positive delta) or charges (negative delta) tokens after the real cost is known."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class RateLimiter:
+    """Combines a requests-per-minute and a tokens-per-minute bucket with a shared pause.
+
+    The pause is set when the API answers 429, so that every worker thread backs off
+    together instead of each one hammering the quota wall independently.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, estimated_tokens):
+        """Blocks until one request costing `estimated_tokens` fits within both quotas."""
+        with self.lock:
+            pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+
+        wait = max(self.request_bucket.reserve(1), self.token_bucket.reserve(estimated_tokens))
+        if wait > 0:
+            time.sleep(wait)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Reconciles the token bucket with the usage reported by the API."""
+        if actual_tokens:
+            self.token_bucket.adjust(estimated_tokens - actual_tokens)
+
+    def pause(self, seconds):
+        """Stops all callers from issuing requests for the next `seconds`."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def backoff_delay(attempt, base=2.0, cap=60.0):
+    """Exponential backoff with jitter for retry number `attempt` (starting at 0)."""
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
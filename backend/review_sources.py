@@ -0,0 +1,226 @@
+import os
+import glob
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+
+# lxml is optional: without it the pure-Python streaming parser is used.
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Survey rows read from the CSV per chunk; memory use is proportional to this, not to the file size.
+INGEST_CSV_CHUNK_ROWS = int(os.getenv("INGEST_CSV_CHUNK_ROWS", "1000"))
+# Bytes of HTML fed to the streaming parser at a time.
+INGEST_HTML_READ_BYTES = 64 * 1024
+# How review cards are extracted from HTML: 'lxml' (C parser, streamed), 'stream' (html.parser, streamed)
+# or 'bs4' (full BeautifulSoup tree; slowest, kept for comparison).
+HTML_SCRAPER_MODE = os.getenv("HTML_SCRAPER_MODE", "lxml" if etree is not None else "stream")
+# Processes used by scrape_html_directory.
+HTML_SCRAPER_WORKERS = int(os.getenv("HTML_SCRAPER_WORKERS", str(os.cpu_count() or 1)))
+
+# Survey question headers mapped to the field names used by the processing pipeline.
+CSV_COLUMNS = {
+    'Timestamp': 'date_collected',
+    'Which university are you rating?': 'uni_name',
+    'City': 'city',
+    'Cost of living': 'cost_score',
+    'Social scene quality': 'social_score',
+    'Accommodation ease (How easy it is to find a living space)': 'accommodation_score',
+    'Please provide your overall experience or any additional comments about your univerisity': 'raw_review_text',
+}
+
+# (tag, class) of each review card field in the scraped HTML.
+CARD_FIELDS = {
+    ('h4', 'uni-name'): 'uni_name',
+    ('p', 'uni-city'): 'city',
+    ('p', 'review-body'): 'raw_review_text',
+}
+
+
+def iter_csv_reviews(csv_path, chunk_rows=None):
+    """Yields survey rows as dicts, reading the CSV `chunk_rows` rows at a time."""
+    import pandas as pd
+
+    with pd.read_csv(csv_path, chunksize=chunk_rows or INGEST_CSV_CHUNK_ROWS) as reader:
+        for chunk in reader:
+            chunk.rename(columns=CSV_COLUMNS, inplace=True)
+            yield from chunk.to_dict(orient='records')
+
+
+class ReviewCardParser(HTMLParser):
+    """Incremental parser that collects uni-review-card fields as the HTML is fed in.
+
+    Completed cards are appended to `cards` as soon as their closing </div> is seen,
+    so callers can drain them between feed() calls without holding the whole document.
+    Text is extracted like BeautifulSoup's get_text(strip=True): every text node is
+    stripped and the pieces are joined without a separator.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cards = []
+        self.card = None
+        self.card_depth = 0
+        self.field = None
+        self.field_tag = None
+        self.field_text = []
+        # A text node can arrive in several handle_data calls when it spans two feed() chunks.
+        self.text_node = []
+
+    def end_text_node(self):
+        if self.text_node:
+            text = ''.join(self.text_node).strip()
+            if text:
+                self.field_text.append(text)
+            self.text_node = []
+
+    def handle_starttag(self, tag, attrs):
+        self.end_text_node()
+        if tag == 'div':
+            if self.card is not None:
+                self.card_depth += 1
+            elif 'uni-review-card' in _classes(attrs):
+                self.card = {}
+                self.card_depth = 1
+            return
+
+        if self.card is None or self.field is not None:
+            return
+        field = _card_field(tag, _classes(attrs), self.card)
+        if field is not None:
+            self.field = field
+            self.field_tag = tag
+            self.field_text = []
+
+    def handle_endtag(self, tag):
+        self.end_text_node()
+        if self.field is not None and tag == self.field_tag:
+            self.card[self.field] = ''.join(self.field_text)
+            self.field = None
+        elif tag == 'div' and self.card is not None:
+            self.card_depth -= 1
+            if self.card_depth == 0:
+                self.cards.append(self.card)
+                self.card = None
+
+    def handle_data(self, data):
+        if self.field is not None:
+            self.text_node.append(data)
+
+    def handle_comment(self, data):
+        # Comments are not text, but they do separate the text nodes around them.
+        self.end_text_node()
+
+
+def _classes(attrs):
+    for name, value in attrs:
+        if name == 'class' and value:
+            return value.split()
+    return []
+
+
+def _card_field(tag, css_classes, card):
+    """Returns the card field an element holds, or None if it is not a field still missing from `card`."""
+    for css_class in css_classes:
+        field = CARD_FIELDS.get((tag, css_class))
+        # Like card.find(), only the first matching element of each field counts.
+        if field is not None and field not in card:
+            return field
+    return None
+
+
+def _iter_cards_stream(html_file_path):
+    parser = ReviewCardParser()
+    with open(html_file_path, 'r', encoding='utf-8') as f:
+        while True:
+            data = f.read(INGEST_HTML_READ_BYTES)
+            if data:
+                parser.feed(data)
+            else:
+                parser.close()
+            yield from parser.cards
+            parser.cards.clear()
+            if not data:
+                return
+
+
+def _iter_cards_lxml(html_file_path):
+    with open(html_file_path, 'rb') as f:
+        for _, element in etree.iterparse(f, events=('end',), tag='div', html=True, encoding='utf-8'):
+            if 'uni-review-card' not in (element.get('class') or '').split():
+                continue
+            # One pass over the card's descendants fills every field.
+            card = {}
+            for child in element.iter('h4', 'p'):
+                field = _card_field(child.tag, (child.get('class') or '').split(), card)
+                if field is not None:
+                    card[field] = ''.join(text.strip() for text in child.itertext())
+            yield card
+
+            # Drop the finished card and everything before it so memory stays flat.
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def _iter_cards_bs4(html_file_path):
+    from bs4 import BeautifulSoup
+
+    with open(html_file_path, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f, 'html.parser')
+    for element in soup.find_all('div', class_='uni-review-card'):
+        card = {}
+        for child in element.find_all(['h4', 'p']):
+            field = _card_field(child.name, child.get('class') or [], card)
+            if field is not None:
+                card[field] = child.get_text(strip=True)
+        yield card
+
+
+CARD_READERS = {'lxml': _iter_cards_lxml, 'stream': _iter_cards_stream, 'bs4': _iter_cards_bs4}
+
+
+def iter_html_reviews(html_file_path, mode=None):
+    """Yields review dicts from a scraped HTML file, one card at a time.
+
+    `mode` picks the extractor (see HTML_SCRAPER_MODE); all of them produce identical
+    records. Cards without a university name or review body are skipped; the city is optional.
+    """
+    mode = mode or HTML_SCRAPER_MODE
+    if mode == 'lxml' and etree is None:
+        mode = 'stream'
+    for card in CARD_READERS[mode](html_file_path):
+        if card.get('uni_name') and card.get('raw_review_text'):
+            yield {
+                'uni_name': card['uni_name'],
+                'city': card.get('city'),
+                'raw_review_text': card['raw_review_text'],
+                'source_type': 'html_scrape' # Indicate the source of this data
+            }
+
+
+def scrape_html_file(html_file_path, mode=None):
+    """Returns every review in one HTML file; errors are reported and yield no reviews."""
+    try:
+        return list(iter_html_reviews(html_file_path, mode))
+    except Exception as e:
+        print(f"❌ ERROR parsing HTML reviews in {html_file_path}: {e}")
+        return []
+
+
+def scrape_html_directory(directory, workers=None, mode=None):
+    """Yields the reviews of every .html/.htm file in `directory`, parsing files in parallel processes.
+
+    Files are handed out one per task and their reviews are yielded in file-name order.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, '*.html')) + glob.glob(os.path.join(directory, '*.htm')))
+    workers = min(workers or HTML_SCRAPER_WORKERS, len(paths))
+    if workers <= 1:
+        for path in paths:
+            yield from scrape_html_file(path, mode)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for reviews in executor.map(scrape_html_file, paths, [mode] * len(paths)):
+            yield from reviews
@@ -0,0 +1,54 @@
+import json
+import decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from metrics import timed_stage
+
+# orjson is optional: without it the provider falls back to the standard library encoder.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    """Encodes the types psycopg2 returns that JSON has no native form for."""
+    if isinstance(value, decimal.Decimal):
+        # Same representation as Flask's default provider ("4.00"), so clients see no change.
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when it is installed.
+
+    Rows built with dict(zip(column_names, record)) serialize directly: lists (including
+    PostgreSQL arrays) and datetimes are handled natively, Decimals from ROUND(...)::numeric
+    via _default. Keys keep column order instead of being sorted, which also saves work.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default).decode("utf-8")
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("ensure_ascii", False)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        with timed_stage('serialize'):
+            obj = self._prepare_response_obj(args, kwargs)
+            if orjson is not None:
+                # Skip the str round trip: orjson already produces the UTF-8 body.
+                body = orjson.dumps(obj, default=_default, option=orjson.OPT_APPEND_NEWLINE)
+                return self._app.response_class(body, mimetype=self.mimetype)
+            return super().response(*args, **kwargs)
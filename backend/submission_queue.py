@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from db_pool import pooled_connection
+
+# 1 = POST /api/submit_review queues submissions in a local file and answers 202; a background
+# thread in each worker writes them to PostgreSQL in batches. 0 = insert and commit per request.
+SUBMIT_WRITE_BEHIND = os.getenv("SUBMIT_WRITE_BEHIND", "0") == "1"
+# Shared by every worker on the host, so it must be on a local disk that survives restarts.
+SUBMISSION_QUEUE_PATH = os.getenv(
+    "SUBMISSION_QUEUE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'submission_queue.sqlite3')
+)
+# Submissions written per multi-row INSERT (and per PostgreSQL transaction).
+SUBMISSION_FLUSH_BATCH = int(os.getenv("SUBMISSION_FLUSH_BATCH", "500"))
+# Seconds the flusher sleeps when the queue is empty; also the longest a submission waits alone.
+SUBMISSION_FLUSH_INTERVAL = float(os.getenv("SUBMISSION_FLUSH_INTERVAL", "0.2"))
+# A batch claimed by a flusher that died mid-write is handed out again after this many seconds.
+SUBMISSION_CLAIM_TIMEOUT = 60
+
+# Column order of submission_values(); ON CONFLICT makes a repeated flush of the same submission a no-op.
+SQL_INSERT_SUBMISSIONS = """
+    INSERT INTO exchange_reviews (
+        submission_id, uni_name, city, source_type, raw_review_text, raw_language,
+        overall_sentiment, academics_score, cost_score, social_score,
+        accommodation_score, theme_summary, reviewer_type, status, major
+    ) VALUES %s
+    ON CONFLICT (submission_id) DO NOTHING;
+"""
+
+
+def submission_values(submission_id, review_data):
+    """The exchange_reviews row for a validated user submission, in SQL_INSERT_SUBMISSIONS column order."""
+    # For user-submitted reviews, we'll use placeholder values for AI-generated fields initially.
+    # The AI processor will eventually update theme_summary based on all text.
+    # Set raw_language to 'en' by default for now, can be expanded later.
+    # overall_sentiment and theme_summary will be null/empty until ai_processor runs.
+    return (
+        submission_id,
+        review_data['uni_name'],
+        review_data.get('city', 'Unknown'), # City might not be in submission, default to 'Unknown'
+        'user_submitted', # Mark as user submitted
+        review_data['raw_review_text'],
+        review_data.get('raw_language', 'en'), # Assume English for user input, can be enhanced
+        'Neutral', # Default sentiment for initial user reviews
+        review_data['academics_score'],
+        review_data['cost_score'],
+        review_data['social_score'],
+        review_data['accommodation_score'],
+        review_data.get('theme_summary', 'User-provided review.'), # Placeholder summary
+        'user_submitted', # Explicitly set reviewer type
+        'pending', # New reviews are pending approval
+        None # Major not collected from user reviews currently
+    )
+
+
+def insert_submissions(conn, rows):
+    """Inserts submission rows with one multi-row INSERT; the caller commits."""
+    cursor = conn.cursor()
+    try:
+        execute_values(cursor, SQL_INSERT_SUBMISSIONS, rows, page_size=len(rows))
+    finally:
+        cursor.close()
+
+
+class SubmissionQueue:
+    """Durable FIFO of submissions waiting to be written to PostgreSQL, backed by a SQLite file in WAL mode.
+
+    A row is 'queued' until a flusher claims it, and deleted once its INSERT is committed.
+    Rows PostgreSQL rejects (e.g. a value too long for its column) are kept as 'failed'
+    so they can be inspected instead of blocking the queue.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        # FULL syncs every enqueue: a 202 promises the submission survives a power cut.
+        self.conn.execute("PRAGMA synchronous=FULL;")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS submission_queue ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " submission_id TEXT NOT NULL UNIQUE,"
+            " row TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'queued',"
+            " claimed_until REAL NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " enqueued_at REAL NOT NULL"
+            ");"
+        )
+        self.conn.commit()
+
+    def put(self, submission_id, row):
+        """Durably stores one submission row (see submission_values)."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO submission_queue (submission_id, row, enqueued_at) VALUES (?, ?, ?);",
+                (submission_id, json.dumps(row, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+
+    def claim(self, limit):
+        """Claims up to `limit` of the oldest unclaimed submissions; returns [(seq, row)].
+
+        Claims expire after SUBMISSION_CLAIM_TIMEOUT, so rows held by a dead flusher (in
+        another worker, or before a restart) are picked up again.
+        """
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                "UPDATE submission_queue SET claimed_until = ?"
+                " WHERE seq IN (SELECT seq FROM submission_queue WHERE status = 'queued' AND claimed_until < ? ORDER BY seq LIMIT ?)"
+                " RETURNING seq, row;",
+                (now + SUBMISSION_CLAIM_TIMEOUT, now, limit)
+            ).fetchall()
+            self.conn.commit()
+        return sorted((seq, tuple(json.loads(row))) for seq, row in rows)
+
+    def complete(self, seqs):
+        """Removes submissions whose INSERT has been committed."""
+        with self.lock:
+            self.conn.executemany("DELETE FROM submission_queue WHERE seq = ?;", [(seq,) for seq in seqs])
+            self.conn.commit()
+
+    def release(self, seqs):
+        """Returns claimed submissions to the queue, e.g. after the database was unreachable."""
+        with self.lock:
+            self.conn.executemany("UPDATE submission_queue SET claimed_until = 0 WHERE seq = ?;", [(seq,) for seq in seqs])
+            self.conn.commit()
+
+    def fail(self, seq, error):
+        """Parks a submission PostgreSQL rejected, so it stops being retried."""
+        with self.lock:
+            self.conn.execute("UPDATE submission_queue SET status = 'failed', error = ? WHERE seq = ?;", (error, seq))
+            self.conn.commit()
+
+    def depth(self):
+        """Number of submissions not yet written to PostgreSQL (excluding failed ones)."""
+        with self.lock:
+            return self.conn.execute("SELECT count(*) FROM submission_queue WHERE status = 'queued';").fetchone()[0]
+
+    def failed_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT count(*) FROM submission_queue WHERE status = 'failed';").fetchone()[0]
+
+
+_queue = None
+_queue_pid = None
+_flusher = None
+_flusher_pid = None
+_queue_lock = threading.Lock()
+
+
+def get_submission_queue():
+    """Returns this process's handle on the queue file, reopened after fork on first use."""
+    global _queue, _queue_pid
+    with _queue_lock:
+        if _queue is None or _queue_pid != os.getpid():
+            _queue = SubmissionQueue(SUBMISSION_QUEUE_PATH)
+            _queue_pid = os.getpid()
+    return _queue
+
+
+def enqueue_submission(submission_id, review_data):
+    """Queues a validated submission for the background flusher."""
+    get_submission_queue().put(submission_id, submission_values(submission_id, review_data))
+
+
+# The database is unreachable or the connection broke: the rows are fine and are retried later.
+# Any other error is blamed on the data and isolated row by row.
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+def _rollback_quietly(conn):
+    try:
+        conn.rollback()
+    except Exception:
+        pass  # The connection is already broken; the pool discards it.
+
+
+def _write_rows_individually(queue, conn, batch):
+    """Writes a batch one row at a time after its multi-row INSERT failed; returns the seqs written.
+
+    Rows the database rejects are parked as failed. A connection error completes the rows
+    already committed, releases the rest and propagates.
+    """
+    written = []
+    for index, (seq, row) in enumerate(batch):
+        try:
+            insert_submissions(conn, [row])
+            conn.commit()
+        except CONNECTION_ERRORS:
+            _rollback_quietly(conn)
+            queue.complete(written)
+            queue.release([pending_seq for pending_seq, _ in batch[index:]])
+            raise
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Submission {row[0]} was rejected by the database and parked as failed: {e}")
+            queue.fail(seq, str(e))
+            continue
+        written.append(seq)
+    return written
+
+
+def flush_once(queue, limit=SUBMISSION_FLUSH_BATCH):
+    """Writes one batch of queued submissions to PostgreSQL; returns how many were claimed.
+
+    Raises if the database is unavailable; the unwritten rows are then released for a later attempt.
+    """
+    batch = queue.claim(limit)
+    if not batch:
+        return 0
+    seqs = [seq for seq, _ in batch]
+
+    with pooled_connection() as conn:
+        if conn is None:
+            queue.release(seqs)
+            raise psycopg2.OperationalError("database connection failed")
+        try:
+            insert_submissions(conn, [row for _, row in batch])
+            conn.commit()
+        except CONNECTION_ERRORS:
+            _rollback_quietly(conn)
+            queue.release(seqs)
+            raise
+        except Exception:
+            # One bad row (rejected by PostgreSQL, or not even adaptable by psycopg2) fails the
+            # whole statement; write the rows one by one to isolate it instead of retrying forever.
+            conn.rollback()
+            seqs = _write_rows_individually(queue, conn, batch)
+
+    queue.complete(seqs)
+    print(f"💾 Wrote {len(seqs)} queued review submissions to the database ({queue.depth()} still queued).")
+    return len(batch)
+
+
+def _flush_forever():
+    retry_delay = 1.0
+    while True:
+        queue = get_submission_queue()
+        try:
+            flushed = flush_once(queue)
+            retry_delay = 1.0
+        except Exception as e:
+            print(f"⚠️ Could not write queued review submissions: {e}. Retrying in {retry_delay:.0f}s...")
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 30.0)
+            continue
+        if flushed < SUBMISSION_FLUSH_BATCH:
+            time.sleep(SUBMISSION_FLUSH_INTERVAL)
+
+
+def ensure_flusher_running():
+    """Starts the flusher thread in the current process if it is not running yet (safe after fork).
+
+    Every worker runs one; claims keep them from writing the same batch concurrently.
+    """
+    global _flusher, _flusher_pid
+    if _flusher is not None and _flusher.is_alive() and _flusher_pid == os.getpid():
+        return
+    with _queue_lock:
+        if _flusher is not None and _flusher.is_alive() and _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+        _flusher = threading.Thread(target=_flush_forever, name="submission-flusher", daemon=True)
+        _flusher.start()
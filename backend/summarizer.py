@@ -0,0 +1,144 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis_cache import analysis_cache_key
+from gemini_client import (
+    GEMINI_MAX_CONCURRENCY, GEMINI_MODEL_NAME, REVIEW_ANALYSIS_SCHEMA,
+    analyze_review_with_gemini, build_json_model, estimate_tokens,
+    generate_with_backoff, get_analysis_cache, is_valid_analysis
+)
+
+# Reviews totalling fewer tokens than this are summarized in a single call, as before.
+SUMMARY_SINGLE_PASS_TOKENS = int(os.getenv("SUMMARY_SINGLE_PASS_TOKENS", "8000"))
+# Token budget of the review text packed into each map-step chunk.
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
+# Bump whenever the chunk or reduce prompt wording changes.
+SUMMARY_PROMPT_VERSION = 1
+
+CHUNK_NOTES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "notes": {"type": "string", "description": "Around 100 words of notes on academics, cost of living, social scene and accommodation, with how often each point was raised."},
+        "quotes": {"type": "array", "items": {"type": "string"}, "description": "Up to two very short, representative quotes copied from the reviews."}
+    },
+    "required": ["notes", "quotes"]
+}
+
+
+def chunk_by_tokens(texts, token_budget):
+    """Greedily packs texts, in order, into chunks of at most `token_budget` estimated tokens.
+
+    Texts keep their order, so appending a new review only changes the last chunk and
+    every earlier chunk (and its cached summary) stays identical.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def summarize_chunk(chunk, uni_name):
+    """Map step: condenses one chunk of texts into notes, reusing the cached result when the chunk is unchanged."""
+    cache = get_analysis_cache()
+    cache_key = analysis_cache_key("summary_chunk", chunk, uni_name, SUMMARY_PROMPT_VERSION, GEMINI_MODEL_NAME, CHUNK_NOTES_SCHEMA)
+    if cache is not None:
+        cached_notes = cache.get(cache_key)
+        if cached_notes is not None:
+            return cached_notes
+
+    reviews_text = "\n---\n".join(chunk)
+    prompt = f"""
+    You are an expert student advisor condensing a batch of student feedback about "{uni_name}".
+    Write compact notes on Academics, Cost of Living, Social Scene, and Accommodation, noting which points many students agree on.
+    Keep up to two very short quotes, copied exactly from the feedback.
+
+    The raw student feedback (which may contain both English and Arabic) follows, one entry per "---":
+
+    {reviews_text}
+    """
+    try:
+        response = generate_with_backoff(build_json_model(CHUNK_NOTES_SCHEMA), prompt)
+        notes = json.loads(response.text)
+    except Exception as e:
+        print(f"❌ Gemini chunk summary failed for {uni_name}: {e}")
+        return None
+
+    if not (isinstance(notes, dict) and isinstance(notes.get("notes"), str)):
+        return None
+    if cache is not None:
+        cache.put(cache_key, notes)
+    return notes
+
+
+def reduce_notes(notes_list, uni_name):
+    """Reduce step: turns chunk notes into the final analysis, in the same shape as analyze_review_with_gemini."""
+    cache = get_analysis_cache()
+    cache_key = analysis_cache_key("summary_reduce", notes_list, uni_name, SUMMARY_PROMPT_VERSION, GEMINI_MODEL_NAME, REVIEW_ANALYSIS_SCHEMA)
+    if cache is not None:
+        cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+    notes_text = "\n\n".join(
+        f"Notes {index + 1}: {notes['notes']}\nQuotes: {json.dumps(notes.get('quotes', []), ensure_ascii=False)}"
+        for index, notes in enumerate(notes_list)
+    )
+    prompt = f"""
+    You are an expert student advisor analyzing feedback for {uni_name}.
+    Your goal is to synthesize a very concise, easy-to-understand narrative review (approximately 30-40 words) for the university "{uni_name}".
+
+    The review must briefly cover Academics, Cost of Living, Social Scene, and Accommodation, using simple, direct language.
+    Weigh points by how many students raised them, and include one very short, direct quote taken from the quotes below.
+    Ensure the summary is structured as a single narrative paragraph.
+
+    Synthesize the report from the following notes, each condensed from a batch of raw student feedback:
+
+    {notes_text}
+    """
+    try:
+        response = generate_with_backoff(build_json_model(REVIEW_ANALYSIS_SCHEMA), prompt)
+        result = json.loads(response.text)
+    except Exception as e:
+        print(f"❌ Gemini reduce step failed for {uni_name}: {e}")
+        return None
+
+    if cache is not None and is_valid_analysis(result):
+        cache.put(cache_key, result)
+    return result
+
+
+def summarize_reviews(reviews, uni_name):
+    """Summarizes any number of reviews for one university.
+
+    Small inputs use a single analyze_review_with_gemini call. Larger ones are chunked by
+    token budget, the chunks are summarized in parallel (map), and the chunk notes are
+    combined into the final analysis (reduce), recursing if the notes themselves are too long.
+    """
+    all_reviews_text = "\n---\n".join(reviews)
+    if estimate_tokens(all_reviews_text) <= SUMMARY_SINGLE_PASS_TOKENS:
+        return analyze_review_with_gemini(all_reviews_text, uni_name)
+
+    chunks = chunk_by_tokens(reviews, SUMMARY_CHUNK_TOKENS)
+    print(f"🧩 Summarizing {len(reviews)} reviews for {uni_name} in {len(chunks)} chunks...")
+    with ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY) as executor:
+        notes_list = list(executor.map(lambda chunk: summarize_chunk(chunk, uni_name), chunks))
+
+    if any(notes is None for notes in notes_list):
+        return None
+
+    notes_tokens = sum(estimate_tokens(notes["notes"]) for notes in notes_list)
+    if notes_tokens > SUMMARY_SINGLE_PASS_TOKENS:
+        # Too many chunks to reduce in one prompt: summarize the notes hierarchically.
+        return summarize_reviews([notes["notes"] for notes in notes_list], uni_name)
+    return reduce_notes(notes_list, uni_name)
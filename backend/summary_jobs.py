@@ -0,0 +1,208 @@
+import os
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from db_pool import pooled_connection
+
+# Background threads per worker process that run Gemini summary jobs.
+SUMMARY_JOB_WORKERS = int(os.getenv("SUMMARY_JOB_WORKERS", "2"))
+# Jobs still queued/running after this many seconds are presumed lost (e.g. the worker died).
+SUMMARY_JOB_TIMEOUT = int(os.getenv("SUMMARY_JOB_TIMEOUT", "300"))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns this process's job executor, creating it after fork on first use."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=SUMMARY_JOB_WORKERS, thread_name_prefix="summary-job")
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def get_raw_reviews_text(uni_name):
+    """Fetches the raw texts of a university's approved reviews, oldest first.
+
+    The stable order keeps summarizer chunks (and their cached summaries) unchanged as reviews are added.
+    Only approved reviews are summarized, so a summary is current until university_stats changes.
+    """
+    with pooled_connection() as conn:
+        if conn is None: return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT raw_review_text FROM exchange_reviews WHERE uni_name = %s AND status = 'approved' ORDER BY id;",
+                (uni_name,)
+            )
+            reviews = [row[0] for row in cursor.fetchall()]
+            return reviews
+        except Exception as e:
+            print(f"Error fetching raw reviews: {e}")
+            return []
+        finally:
+            if cursor: cursor.close()
+
+
+def enqueue_summary_job(conn, uni_name):
+    """Returns the ID of the active summary job for `uni_name`, starting one if there is none.
+
+    The partial unique index on summary_jobs (migrations/0005) makes this single-flight
+    across all workers: concurrent callers for the same university share one job.
+    Returns None, without creating a job, if the university has no approved reviews.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1 FROM university_stats WHERE uni_name = %s AND review_count > 0;", (uni_name,))
+        if cursor.fetchone() is None:
+            return None
+
+        # Release the slot held by a job whose worker died mid-flight.
+        cursor.execute("""
+            UPDATE summary_jobs SET status = 'failed', error = 'Job timed out.', updated_at = now()
+            WHERE uni_name = %s AND status IN ('queued', 'running')
+              AND updated_at < now() - make_interval(secs => %s);
+        """, (uni_name, SUMMARY_JOB_TIMEOUT))
+
+        cursor.execute("""
+            INSERT INTO summary_jobs (id, uni_name, status) VALUES (%s, %s, 'queued')
+            ON CONFLICT (uni_name) WHERE status IN ('queued', 'running') DO NOTHING
+            RETURNING id;
+        """, (str(uuid.uuid4()), uni_name))
+        created = cursor.fetchone()
+        if created is None:
+            cursor.execute(
+                "SELECT id FROM summary_jobs WHERE uni_name = %s AND status IN ('queued', 'running');",
+                (uni_name,)
+            )
+            existing = cursor.fetchone()
+        conn.commit()
+    finally:
+        cursor.close()
+
+    if created is not None:
+        job_id = str(created[0])
+        get_executor().submit(run_summary_job, job_id, uni_name)
+        print(f"⏳ Queued AI summary job {job_id} for {uni_name}.")
+        return job_id
+    # The active job finished between the INSERT and the SELECT; start a fresh one.
+    if existing is None:
+        return enqueue_summary_job(conn, uni_name)
+    return str(existing[0])
+
+
+def get_summary_job(conn, job_id):
+    """Returns the job as a dict, or None if no job has that ID."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT id::text AS job_id, uni_name, status, summary, error FROM summary_jobs WHERE id = %s;",
+            (job_id,)
+        )
+        record = cursor.fetchone()
+        if record is None:
+            return None
+        column_names = [desc[0] for desc in cursor.description]
+        return dict(zip(column_names, record))
+    finally:
+        cursor.close()
+
+
+def get_last_summary(conn, uni_name):
+    """Returns the most recent generated summary for `uni_name` that is still current, or None.
+
+    A summary expires once the university's approved reviews change: the stats trigger
+    (migrations/0003) bumps university_stats.updated_at, which then postdates the job.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT j.summary
+            FROM summary_jobs j
+            JOIN university_stats s ON s.uni_name = j.uni_name
+            WHERE j.uni_name = %s AND j.status = 'done' AND j.created_at >= s.updated_at
+            ORDER BY j.updated_at DESC
+            LIMIT 1;
+        """, (uni_name,))
+        record = cursor.fetchone()
+        return record[0] if record else None
+    finally:
+        cursor.close()
+
+
+def _set_job_state(job_id, status, summary=None, error=None):
+    with pooled_connection() as conn:
+        if conn is None:
+            print(f"❌ Could not record state '{status}' for summary job {job_id}: database connection failed.")
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "UPDATE summary_jobs SET status = %s, summary = %s, error = %s, updated_at = now() WHERE id = %s;",
+                (status, summary, error, job_id)
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+def _store_summary(uni_name, generated_summary):
+    """Caches the summary on an AI-processed review, where get_ai_summary looks for it first."""
+    with pooled_connection() as conn:
+        if conn is None:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE exchange_reviews SET theme_summary = %s
+                WHERE id = (
+                    SELECT id FROM exchange_reviews
+                    WHERE uni_name = %s AND reviewer_type = 'ai_processed' AND status = 'approved'
+                    ORDER BY id LIMIT 1
+                )
+                RETURNING id;
+            """, (generated_summary, uni_name))
+            updated_id = cursor.fetchone()
+            conn.commit()
+
+            if updated_id:
+                print(f"✅ Cached new AI summary in review ID {updated_id[0]} for {uni_name}.")
+            else:
+                # This case should ideally not happen if ai_processor has run; the job row still keeps the summary.
+                print(f"⚠️ Could not find existing AI-processed review to update for {uni_name}. Consider running ai_processor.py.")
+        finally:
+            cursor.close()
+
+
+def run_summary_job(job_id, uni_name):
+    """Generates the summary for one job. No database connection is held during the Gemini call."""
+    try:
+        _set_job_state(job_id, 'running')
+
+        raw_reviews_list = get_raw_reviews_text(uni_name)
+        if not raw_reviews_list:
+            # Not a summary: recording it as one would serve it until the job expires.
+            _set_job_state(job_id, 'failed', error=f"No reviews found for {uni_name}. Cannot generate AI summary.")
+            return
+
+        # Dynamically import the summarizer (and with it the Gemini client).
+        from summarizer import summarize_reviews
+
+        # Small review sets go to Gemini in one prompt; large ones are map-reduced in chunks.
+        gemini_result = summarize_reviews(raw_reviews_list, uni_name)
+        if not (gemini_result and gemini_result.get("theme_summary")):
+            _set_job_state(job_id, 'failed', error="AI summary could not be generated or was empty.")
+            return
+
+        generated_summary = gemini_result["theme_summary"]
+        print(f"✅ AI summary generated for {uni_name}. Attempting to cache...")
+        _store_summary(uni_name, generated_summary)
+        _set_job_state(job_id, 'done', summary=generated_summary)
+    except Exception as e:
+        print(f"Synthesis failed for {uni_name}: {e}")
+        _set_job_state(job_id, 'failed', error="Failed to generate AI summary due to an internal error.")
@@ -5,6 +5,9 @@ import './App.css';
 import { Button } from 'react-bootstrap';
 import RadarChartComponent from './RadarChartComponent';
 
+// Reviews fetched per request from /api/reviews; "Load more" fetches the next page.
+const REVIEWS_PAGE_SIZE = 5;
+
 const CITY_COORDINATES = {
     "Aalen": [48.84, 10.10],
     "Fulda": [50.56, 9.68],
@@ -43,7 +46,7 @@ function App() {
   const [highlightedUni, setHighlightedUni] = useState(null);
   const [reviewsContent, setReviewsContent] = useState(null);
   const [reviewsRaw, setReviewsRaw] = useState([]);
-  const [reviewsVisibleCount, setReviewsVisibleCount] = useState(5);
+  const [reviewsNextCursor, setReviewsNextCursor] = useState(null); // Cursor of the next page of reviews, null on the last page
   const [showAIReview, setShowAIReview] = useState(false);
   const [loadingAISummary, setLoadingAISummary] = useState(false);
 
@@ -73,17 +76,26 @@ function App() {
     fetchAggregatedUniversityDetails(uniData.uni_name);
   };
 
-  const fetchReviews = async (uniName) => {
+  // Fetches one page of raw reviews, newest first; pass the previous page's next_cursor to continue.
+  const fetchReviews = async (uniName, cursor = null) => {
     const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || "http://127.0.0.1:5000";
     try {
-      const res = await axios.get(`${BACKEND_URL}/api/reviews/${encodeURIComponent(uniName)}`);
-      return res.data; // This endpoint now only returns raw reviews
+      const params = { limit: REVIEWS_PAGE_SIZE, ...(cursor ? { cursor } : {}) };
+      const res = await axios.get(`${BACKEND_URL}/api/reviews/${encodeURIComponent(uniName)}`, { params });
+      return res.data; // { reviews: [...], next_cursor: "..." or null }
     } catch (err) {
       console.error("Error fetching raw reviews:", err);
-      return [];
+      return { reviews: [], next_cursor: null };
     }
   };
 
+  const loadMoreReviews = async () => {
+    if (!selectedUniDetails || !reviewsNextCursor) return;
+    const page = await fetchReviews(selectedUniDetails.uni_name, reviewsNextCursor);
+    setReviewsRaw(prev => [...prev, ...page.reviews]);
+    setReviewsNextCursor(page.next_cursor);
+  };
+
   const fetchAggregatedUniversityDetails = async (uniName) => {
     const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || "http://127.0.0.1:5000";
     setLoadingAISummary(true); // Re-using this for overall data loading indication
@@ -97,14 +109,15 @@ function App() {
         setSelectedUniDetails(data);
         setReviewsContent(data.theme_summary || 'No AI summary available.');
         // Fetch individual raw reviews separately for the list
-        const rawReviews = await fetchReviews(uniName); 
-        setReviewsRaw(rawReviews);
-        setReviewsVisibleCount(5); // Reset visible count on new selection
+        const firstPage = await fetchReviews(uniName);
+        setReviewsRaw(firstPage.reviews);
+        setReviewsNextCursor(firstPage.next_cursor);
         return data; // Return the full aggregated data
       } else {
         setReviewsContent(data?.error || `No details found for ${uniName}.`);
         setSelectedUniDetails(null); // Clear details if not found
         setReviewsRaw([]);
+        setReviewsNextCursor(null);
         return null; 
       }
     } catch (err) {
@@ -112,6 +125,7 @@ function App() {
       setError("Failed to fetch university details. Please check server or try again.");
       setSelectedUniDetails(null);
       setReviewsRaw([]);
+      setReviewsNextCursor(null);
       setReviewsContent('Failed to load details.');
       return null;
     } finally {
@@ -119,30 +133,37 @@ function App() {
     }
   };
 
-  const handleSelectForComparison = async (uniData) => {
-    // Fetch full details for the university when it's selected for comparison
-    const fullUniDetails = await fetchAggregatedUniversityDetails(uniData.uni_name);
-
-    if (!fullUniDetails) {
-      console.error("Could not fetch full details for comparison selection.", uniData);
-      return;
+  // Loads both selected universities (scores, AI summaries, ranks and deltas) with a single request.
+  const openComparison = async () => {
+    const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || "http://127.0.0.1:5000";
+    const params = new URLSearchParams();
+    [compareUni1, compareUni2].forEach((uni) => params.append('unis', uni.uni_name));
+    try {
+      const res = await axios.get(`${BACKEND_URL}/api/compare?${params.toString()}`);
+      const byName = Object.fromEntries(res.data.universities.map((uni) => [uni.uni_name, uni]));
+      setCompareUni1((uni) => ({ ...uni, ...byName[uni.uni_name] }));
+      setCompareUni2((uni) => ({ ...uni, ...byName[uni.uni_name] }));
+    } catch (err) {
+      console.error("Error fetching comparison:", err);
     }
+    setShowComparison(true);
+  };
 
-    const uniWithDetails = { ...uniData, ...fullUniDetails };
-
+  const handleSelectForComparison = (uniData) => {
+    // The map row already carries the scores; openComparison loads everything else in one request.
     if (!compareUni1) {
-      setCompareUni1(uniWithDetails);
-    } else if (compareUni1.uni_name === uniWithDetails.uni_name) {
+      setCompareUni1(uniData);
+    } else if (compareUni1.uni_name === uniData.uni_name) {
       // Deselect Uni 1 if clicked again
       setCompareUni1(null);
     } else if (!compareUni2) {
       // Check if Uni 2 is different from Uni 1 before setting
-      if (compareUni1 && uniWithDetails.uni_name === compareUni1.uni_name) {
+      if (compareUni1 && uniData.uni_name === compareUni1.uni_name) {
         console.log("Attempted to select the same university for both comparison slots.");
         return; // Prevent selecting the same university twice
       }
-      setCompareUni2(uniWithDetails);
-    } else if (compareUni2.uni_name === uniWithDetails.uni_name) {
+      setCompareUni2(uniData);
+    } else if (compareUni2.uni_name === uniData.uni_name) {
       // Deselect Uni 2 if clicked again
       setCompareUni2(null);
     } else {
@@ -177,7 +198,7 @@ function App() {
 
       const response = await axios.post(`${BACKEND_URL}/api/submit_review`, reviewData);
 
-      if (response.status === 201) {
+      if (response.status === 201 || response.status === 202) { // 202: queued for writing (write-behind mode)
         setReviewMessage({
           type: 'success',
           text: 'Review submitted successfully! It will be visible shortly.'
@@ -254,7 +275,20 @@ function App() {
     // setLoadingAISummary(true); // Removed as main fetch will handle it
   
     try {
-      const r = await axios.get(`${BACKEND_URL}/api/summary/${encodeURIComponent(uniName)}`);
+      let r = await axios.get(`${BACKEND_URL}/api/summary/${encodeURIComponent(uniName)}`);
+      // 202 means the summary is being generated in the background: poll the job until it finishes
+      if (r.status === 202) {
+        const statusUrl = `${BACKEND_URL}${r.data.status_url}`;
+        for (let attempt = 0; attempt < 30; attempt++) {
+          await new Promise(resolve => setTimeout(resolve, 2000));
+          r = await axios.get(statusUrl);
+          if (r.data.status === 'failed') return `AI summary error: ${r.data.error}.`;
+          if (r.data.status === 'done') break;
+        }
+        if (r.data.status !== 'done') {
+          return 'The AI summary is taking longer than expected. Please try again in a minute.';
+        }
+      }
       if (r.data && r.data.summary) {
         return String(r.data.summary);
       } else if (r.data && r.data.error) {
@@ -263,6 +297,9 @@ function App() {
         return 'No AI summary available.';
       }
     } catch (e) {
+      if (e.response && e.response.status === 404) {
+        return 'No AI summary available: this university has no approved reviews yet.';
+      }
       console.error("Error fetching AI summary:", e);
       return 'Failed to fetch AI summary.';
     } finally {
@@ -326,7 +363,7 @@ function App() {
       <div className="comparison-bar d-flex justify-content-center mb-3">
         <Button 
           variant="primary" 
-          onClick={() => setShowComparison(true)} 
+          onClick={openComparison} 
           disabled={!compareUni1 || !compareUni2} // Enable only when both are selected
           className="me-2"
         >
@@ -522,7 +559,7 @@ function App() {
                     <h6>Student reviews</h6>
                     {reviewsRaw && reviewsRaw.length > 0 ? (
                       <div className="reviews-list">
-                        {reviewsRaw.slice(0, reviewsVisibleCount).map((r, idx) => (
+                        {reviewsRaw.map((r, idx) => (
                           <div className="review-item" key={r.id || idx}>
                             <div className="review-meta small text-muted">
                               {r.reviewer_type === 'user_submitted' ? 'User Review' : (r.source_type === 'html_scrape' ? 'Web Scrape' : 'Survey')}
@@ -546,9 +583,9 @@ function App() {
                     ) : (
                       <div className="small text-muted">No student reviews available.</div>
                     )}
-                    {reviewsRaw && reviewsRaw.length > reviewsVisibleCount && (
+                    {reviewsNextCursor && (
                       <div className="mt-2 text-center">
-                        <Button variant="outline-primary" size="sm" onClick={() => setReviewsVisibleCount(c => c + 5)}>Load more</Button>
+                        <Button variant="outline-primary" size="sm" onClick={loadMoreReviews}>Load more</Button>
                       </div>
                     )}
                   </div>